@@ -0,0 +1,168 @@
+import numpy as np
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.trace_store import TraceStore
+
+
+class ArrivalStream:
+    """
+    Iterator over call arrivals, produced one chunk at a time so that memory does not grow with the run length.
+    Each arrival is a tuple (inter_arrival_time, station, duration, direction, speed, position), laid out like the
+    tail of an event entry
+    """
+    DEFAULT_CHUNK_SIZE = 10000
+    # Layout of arrivals as a structured array, see next_array and CachedArrivalStream
+    DTYPE = np.dtype([("inter_arrival_time", np.float64), ("station", np.int16), ("duration", np.float64),
+                      ("direction", np.int8), ("speed", np.float64), ("position", np.float64)])
+
+    def __init__(self, rng: RNG, no_calls: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.rng = rng
+        # Upper bound on the number of arrivals; None means until the source runs out
+        self.no_calls = no_calls
+        self.chunk_size = chunk_size
+        self.no_generated = 0
+        self.chunk = []
+        self.offset = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.offset == len(self.chunk):
+            size = self.next_size()
+            self.chunk = self.next_chunk(size) if size > 0 else []
+            self.offset = 0
+            self.no_generated += len(self.chunk)
+            if not self.chunk:
+                raise StopIteration
+        arrival = self.chunk[self.offset]
+        self.offset += 1
+        return arrival
+
+    def next_size(self):
+        size = self.chunk_size
+        if self.no_calls is not None:
+            size = min(size, self.no_calls - self.no_generated)
+        return size
+
+    def next_array(self):
+        """
+        The arrivals left in the current chunk, or else the whole next chunk, as one structured array of DTYPE (empty
+        once the stream has run out); chunks are cut exactly as when iterating, so both give the same arrivals
+        """
+        if self.offset < len(self.chunk):
+            arrivals = np.array(self.chunk[self.offset:], dtype=self.DTYPE)
+        else:
+            size = self.next_size()
+            arrivals = np.zeros(0, dtype=self.DTYPE)
+            if size > 0:
+                columns = self.next_columns(size)
+                arrivals = np.empty(len(columns[0]), dtype=self.DTYPE)
+                for name, column in zip(self.DTYPE.names, columns):
+                    arrivals[name] = column
+            self.no_generated += len(arrivals)
+        self.chunk = []
+        self.offset = 0
+        return arrivals
+
+    def next_columns(self, size: int):
+        """
+        Arrays of the next size inter-arrival times, stations, durations, directions, speeds and positions
+        """
+        raise NotImplementedError
+
+    def next_chunk(self, size: int):
+        return list(zip(*(column.tolist() for column in self.next_columns(size))))
+
+    def discard_chunk(self):
+        """
+        Forget the unconsumed rest of the current chunk so that it is produced again, from the current generator
+        state, by the next call
+        """
+        self.no_generated -= len(self.chunk) - self.offset
+        self.chunk = []
+        self.offset = 0
+
+
+class StochasticArrivalStream(ArrivalStream):
+    """
+    Arrivals drawn from the fitted input distributions, one vectorized batch per chunk
+    """
+
+    def __init__(self, rng: RNG, no_calls: int = None, chunk_size: int = ArrivalStream.DEFAULT_CHUNK_SIZE):
+        super().__init__(rng, no_calls, chunk_size)
+        # Sums of the inter-arrival times, durations and speeds drawn so far, for control variates
+        self.input_sums = np.zeros(3)
+
+    def next_columns(self, size: int):
+        rng = self.rng
+        inter_arrival_times = rng.generate_inter_arrival_times(size)
+        base_stations = rng.generate_base_stations(size)
+        durations = rng.generate_durations(size)
+        directions = rng.generate_directions(size)
+        speeds = rng.generate_speeds(size)
+        positions = rng.generate_positions(size)
+        self.input_sums += (inter_arrival_times.sum(), durations.sum(), speeds.sum())
+        return inter_arrival_times, base_stations, durations, directions, speeds, positions
+
+    def discard_chunk(self):
+        # The discarded arrivals no longer count as drawn
+        rest = np.array(self.chunk[self.offset:], dtype=self.DTYPE)
+        self.input_sums -= (rest["inter_arrival_time"].sum(), rest["duration"].sum(), rest["speed"].sum())
+        super().discard_chunk()
+
+    def input_means(self):
+        """
+        Sample means of the inputs drawn so far, in the order of RandomNumberGenerator.input_means
+        """
+        return self.input_sums / max(self.no_generated, 1)
+
+
+class TraceArrivalStream(ArrivalStream):
+    """
+    Arrivals replayed from a call trace, sliced from its memory-mapped columns (see TraceStore); position and
+    direction are not recorded in the trace and are drawn from the generator
+    """
+
+    def __init__(self, rng: RNG, path: str = "./data.csv", no_calls: int = None,
+                 chunk_size: int = ArrivalStream.DEFAULT_CHUNK_SIZE):
+        super().__init__(rng, no_calls, chunk_size)
+        self.path = path
+        self.columns = TraceStore.load(path)
+
+    def next_columns(self, size: int):
+        start = self.no_generated
+        stop = min(start + size, len(self.columns["inter_arrival_time"]))
+        size = max(stop - start, 0)
+        return (self.columns["inter_arrival_time"][start:stop], self.columns["base_station"][start:stop],
+                self.columns["duration"][start:stop], self.rng.generate_directions(size),
+                self.columns["speed"][start:stop], self.rng.generate_positions(size))
+
+
+class CachedArrivalStream(ArrivalStream):
+    """
+    Arrivals replayed from a structured array (possibly memory-mapped) recorded from another stream, so that
+    several configurations can be driven by exactly the same calls (common random numbers)
+    """
+    def __init__(self, arrivals: np.ndarray, chunk_size: int = ArrivalStream.DEFAULT_CHUNK_SIZE):
+        super().__init__(rng=None, no_calls=len(arrivals), chunk_size=chunk_size)
+        self.arrivals = arrivals
+
+    def next_columns(self, size: int):
+        arrivals = self.arrivals[self.no_generated:self.no_generated + size]
+        return tuple(arrivals[name] for name in self.DTYPE.names)
+
+    def next_chunk(self, size: int):
+        return self.arrivals[self.no_generated:self.no_generated + size].tolist()
+
+    @classmethod
+    def record(cls, stream: ArrivalStream):
+        """
+        Drain a stream into a structured array, one chunk at a time
+        """
+        chunks = []
+        while True:
+            chunk = stream.next_array()
+            if len(chunk) == 0:
+                break
+            chunks.append(chunk)
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=cls.DTYPE)
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import unittest
+import numpy as np
+from libs.arrival_stream import CachedArrivalStream, StochasticArrivalStream, TraceArrivalStream
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+from libs.trace_store import TraceStore
+
+
+class TestArrivalStream(unittest.TestCase):
+    def test_iteration_matches_batch_draws(self):
+        arrivals = list(StochasticArrivalStream(RNG(3), no_calls=25, chunk_size=10))
+        rng = RNG(3)
+        expected = []
+        for size in (10, 10, 5):
+            columns = (rng.generate_inter_arrival_times(size), rng.generate_base_stations(size),
+                       rng.generate_durations(size), rng.generate_directions(size), rng.generate_speeds(size),
+                       rng.generate_positions(size))
+            expected += list(zip(*(column.tolist() for column in columns)))
+        self.assertEqual(expected, arrivals)
+
+    def test_stream_stops_at_no_calls(self):
+        stream = StochasticArrivalStream(RNG(3), no_calls=25, chunk_size=10)
+        self.assertEqual(25, len(list(stream)))
+        self.assertIsNone(next(stream, None))
+        self.assertEqual(25, stream.no_generated)
+        self.assertEqual(7, len(list(TraceArrivalStream(RNG(3), no_calls=7, chunk_size=3))))
+
+    def test_trace_stream_ends_with_the_trace(self):
+        columns = TraceStore.load("./data.csv")
+        stream = TraceArrivalStream(RNG(3), chunk_size=3000)
+        arrivals = np.array(list(stream), dtype=TraceArrivalStream.DTYPE)
+        self.assertEqual(len(columns["inter_arrival_time"]), len(arrivals))
+        self.assertIsNone(next(stream, None))
+        for name, column in (("inter_arrival_time", "inter_arrival_time"), ("station", "base_station"),
+                             ("duration", "duration"), ("speed", "speed")):
+            self.assertEqual(columns[column].tolist(), arrivals[name].tolist())
+
+    def test_simulator_results_do_not_depend_on_chunk_size(self):
+        # Generated streams draw column by column within a chunk, so the chunking is varied on recorded arrivals
+        arrivals = CachedArrivalStream.record(StochasticArrivalStream(RNG(8), no_calls=3000))
+        results = []
+        for chunk_size in (1, 7, 1000, 10000):
+            simulator = Simulator(index=0, no_events_total=3000, output_analyzer=None, no_reserved=1,
+                                  warm_up_events=300, arrival_stream=CachedArrivalStream(arrivals, chunk_size))
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append((simulator.run(), simulator.statistics.block_rate_series.tolist()))
+        self.assertTrue(all(result == results[0] for result in results[1:]))
+
+
+if __name__ == '__main__':
+    unittest.main()
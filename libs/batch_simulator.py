@@ -0,0 +1,334 @@
+from libs.arrival_stream import ArrivalStream, StochasticArrivalStream, TraceArrivalStream
+from libs.event import Event
+from libs.output_analysis import OutputAnalyzer
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import check_topology
+from libs.streaming_statistics import StreamingStatistics
+import numpy as np
+
+
+class BatchSimulator:
+    """
+    Many independent replications of Simulator advanced together in one process. Replication r has index r along
+    the replication axis of every state array: channel counts and occupancy sums are replications x (no_stations + 2)
+    arrays, pending events live in preallocated slots x replications arrays, one per field (slot 0 holds the pending
+    arrival, the others one event per call in progress). Each step pops the next event of every replication at once,
+    in the (arrival_time, seq) order of the scalar event list, and applies arrivals, handovers and terminations with
+    masks. Given the same arrivals, every replication ends with exactly the same counters, series and station
+    measures as Simulator
+    """
+    # Fields of a pending event besides its time and sequence number, each held in an event_<field> array; only
+    # arrivals have a position, so it is kept for slot 0 alone
+    EVENT_DTYPE = np.dtype([("type", np.int8), ("station", np.int32), ("duration", np.float64),
+                            ("direction", np.int8), ("speed", np.float64)])
+
+    def __init__(self, indices: [int], no_events_total: int, output_analyzer: OutputAnalyzer, no_reserved: int,
+                 warm_up_events: int = 0,
+                 stochastic: bool = True,
+                 rngs: [RNG] = None,
+                 record_interval: int = 1,
+                 arrival_streams: [ArrivalStream] = None,
+                 trace_path: str = "./data.csv",
+                 no_channels: int = 10,
+                 no_stations: int = 20,
+                 cell_length: float = 2.0,
+                 chunk_size: int = 1000):
+        """
+        Replication indices[r] runs on rngs[r], or on arrival_streams[r] when given
+        """
+        self.indices = list(indices)
+        n = len(self.indices)
+        self.no_events_total = no_events_total
+        self.output_analyzer = output_analyzer
+        self.no_reserved = no_reserved
+        self.warm_up_events = warm_up_events
+        self.stochastic = stochastic
+        self.record_interval = record_interval = StreamingStatistics.interval(no_events_total, record_interval)
+        self.no_channels = no_channels
+        self.no_stations = no_stations
+        self.cell_length = cell_length
+        if arrival_streams is None:
+            if rngs is None:
+                rngs = [RNG(parameters={"BASE_STATION_MAX": no_stations, "CELL_LENGTH": cell_length})
+                        for _ in range(n)]
+            for rng in rngs:
+                check_topology(rng, no_stations, cell_length, stochastic, trace_path, no_events_total)
+            if stochastic:
+                arrival_streams = [StochasticArrivalStream(rng, no_calls=no_events_total) for rng in rngs]
+            else:
+                arrival_streams = [TraceArrivalStream(rng, path=trace_path, no_calls=no_events_total)
+                                   for rng in rngs]
+        if len(arrival_streams) != n:
+            raise Exception("One arrival stream per replication")
+        self.arrival_streams = arrival_streams
+        # Per-replication clock and counters
+        self.clock = np.zeros(n)
+        self.no_call_created = np.zeros(n, dtype=np.int64)
+        self.no_dropped_call = np.zeros(n, dtype=np.int64)
+        self.no_blocked_call = np.zeros(n, dtype=np.int64)
+        self.no_terminated_call = np.zeros(n, dtype=np.int64)
+        # Channel counts and occupancy sums, see Simulator; columns 0 and no_stations + 1 are not used
+        self.no_free_channel = np.full((n, no_stations + 2), no_channels, dtype=np.int64)
+        self.allocation_time_sum = np.zeros((n, no_stations + 2))
+        self.release_time_sum = np.zeros((n, no_stations + 2))
+        self.full_start_time_sum = np.zeros((n, no_stations + 2))
+        self.full_end_time_sum = np.zeros((n, no_stations + 2))
+        # A call holds a channel for as long as it has a pending event, so the calls in progress never outnumber
+        # the channels. Events are stored slot-major (slots x replications), so that finding the next event of
+        # every replication is a minimum over the first axis; an empty slot has an infinite time
+        no_slots = no_channels * no_stations + 1
+        self.times = np.full((no_slots, n), np.inf)
+        self.seqs = np.zeros((no_slots, n), dtype=np.int64)
+        self.event_type = np.zeros((no_slots, n), dtype=self.EVENT_DTYPE["type"])
+        self.event_station = np.zeros((no_slots, n), dtype=self.EVENT_DTYPE["station"])
+        self.event_duration = np.zeros((no_slots, n), dtype=self.EVENT_DTYPE["duration"])
+        self.event_direction = np.zeros((no_slots, n), dtype=self.EVENT_DTYPE["direction"])
+        self.event_speed = np.zeros((no_slots, n), dtype=self.EVENT_DTYPE["speed"])
+        self.arrival_position = np.zeros(n)
+        self.sequence = np.zeros(n, dtype=np.int64)
+        # Stack of the empty call slots of each replication (top at no_empty_slots - 1), lowest slots on top
+        self.empty_slots = np.tile(np.arange(no_slots - 1, 0, -1), (n, 1))
+        self.no_empty_slots = np.full(n, no_slots - 1, dtype=np.int64)
+        # Slots at or beyond this one have never been used in any replication and are left out of the scans
+        self.no_used_slots = 1
+        # Arrivals are moved from each stream into replications x chunk_size buffers (one per field of
+        # ArrivalStream.DTYPE), chunk_size at a time; the rest of the stream's current chunk waits in pending_arrivals
+        self.chunk_size = chunk_size
+        self.arrivals = {name: np.zeros((n, chunk_size), dtype=ArrivalStream.DTYPE[name])
+                         for name in ArrivalStream.DTYPE.names}
+        self.pending_arrivals = [np.zeros(0, dtype=ArrivalStream.DTYPE) for _ in range(n)]
+        self.arrival_offset = np.zeros(n, dtype=np.int64)
+        self.no_buffered_arrivals = np.zeros(n, dtype=np.int64)
+        # Every replication's series are rows of one array, each wrapped in its own StreamingStatistics
+        self.drop_rate_series = np.zeros((n, no_events_total // record_interval + 1))
+        self.block_rate_series = np.zeros((n, no_events_total // record_interval + 1))
+        self.statistics = []
+        for r in range(n):
+            statistics = StreamingStatistics(no_events_total, warm_up_events, record_interval)
+            statistics.drop_rate_series = self.drop_rate_series[r]
+            statistics.block_rate_series = self.block_rate_series[r]
+            self.statistics.append(statistics)
+        self.started = False
+
+    def run(self):
+        self.advance()
+        return self.finish()
+
+    def advance(self):
+        """
+        Process events until the event lists of all replications run empty
+        """
+        rows = np.arange(len(self.indices))
+        if not self.started:
+            # Add the first event
+            self.started = True
+            self.schedule_arrivals(rows, self.clock)
+        while True:
+            times = self.times[:self.no_used_slots]
+            time = times.min(axis=0)
+            active = time < np.inf
+            if active.all():
+                self.step(rows, times, time)
+            elif active.any():
+                self.step(rows[active], times[:, active], time[active])
+            else:
+                break
+
+    def step(self, rows: np.ndarray, times: np.ndarray, time: np.ndarray):
+        """
+        Handle the next event of each replication in rows, given the times of their used slots (one column per
+        replication) and the minimum of every column.
+        All state arrays are indexed through flat views, with one flat index per replication
+        """
+        n = len(self.indices)
+        nearest = np.flatnonzero(times == time)
+        if len(nearest) == len(rows):
+            slots = np.empty(len(rows), dtype=np.int64)
+            slots[nearest % len(rows)] = nearest // len(rows)
+        else:
+            # Ties on the time are broken by sequence number, as in the scalar event list
+            seqs = self.seqs[:self.no_used_slots, rows]
+            slots = np.where(times == time, seqs, np.iinfo(np.int64).max).argmin(axis=0)
+        event = slots * n + rows
+        self.times.reshape(-1)[event] = np.inf
+        self.clock[rows] = time
+        is_arrival = slots == 0
+        is_handover = self.event_type.reshape(-1)[event] == Event.HANDOVER
+        is_call = is_arrival | is_handover
+        station = self.event_station.reshape(-1)[event]
+        direction = self.event_direction.reshape(-1)[event]
+        arrival_rows = rows[is_arrival]
+        if len(arrival_rows) > 0:
+            warm_up = self.no_call_created[arrival_rows] == self.warm_up_events
+            if warm_up.any():
+                self.mark_warm_up(arrival_rows[warm_up])
+            self.no_call_created[arrival_rows] += 1
+        step = np.where(direction == Event.LEFT, -1, 1)
+        station_index = rows * (self.no_stations + 2) + station
+        no_free_channel = self.no_free_channel.reshape(-1)
+        # Free the channel of the station handed over from, or of the station where the call terminates
+        release = ~is_arrival
+        if release.any():
+            release_index = (station_index - is_handover * step)[release]
+            release_time = time[release]
+            free = no_free_channel[release_index]
+            full = free == 0
+            if full.any():
+                self.full_end_time_sum.reshape(-1)[release_index[full]] += release_time[full]
+            no_free_channel[release_index] = free + 1
+            self.release_time_sum.reshape(-1)[release_index] += release_time
+            self.no_terminated_call[rows[~is_call]] += 1
+        # Arrivals need a channel left over after the reserved ones, handovers any free channel
+        free = no_free_channel[station_index]
+        admitted = is_call & (free - is_arrival * self.no_reserved > 0)
+        rejected = is_call & ~admitted
+        if rejected.any():
+            self.no_blocked_call[rows[rejected & is_arrival]] += 1
+            self.no_dropped_call[rows[rejected & is_handover]] += 1
+        # Calls that end here give their slot back
+        ended = release & ~admitted
+        if ended.any():
+            ended_rows = rows[ended]
+            self.empty_slots.reshape(-1)[ended_rows * self.empty_slots.shape[1] +
+                                         self.no_empty_slots[ended_rows]] = slots[ended]
+            self.no_empty_slots[ended_rows] += 1
+        if admitted.any():
+            # Allocate a channel of the current station
+            admitted_rows = rows[admitted]
+            admitted_index = station_index[admitted]
+            admitted_time = time[admitted]
+            admitted_event = event[admitted]
+            free = free[admitted] - 1
+            no_free_channel[admitted_index] = free
+            self.allocation_time_sum.reshape(-1)[admitted_index] += admitted_time
+            full = free == 0
+            if full.any():
+                self.full_start_time_sum.reshape(-1)[admitted_index[full]] += admitted_time[full]
+            speed = self.event_speed.reshape(-1)[admitted_event]
+            duration = self.event_duration.reshape(-1)[admitted_event]
+            # New calls take an empty slot, handed over calls keep theirs
+            new_call = is_arrival[admitted]
+            if new_call.any():
+                new_call_rows = admitted_rows[new_call]
+                self.no_empty_slots[new_call_rows] -= 1
+                new_slots = self.empty_slots.reshape(-1)[new_call_rows * self.empty_slots.shape[1] +
+                                                         self.no_empty_slots[new_call_rows]]
+                self.no_used_slots = max(self.no_used_slots, int(new_slots.max()) + 1)
+                admitted_event[new_call] = new_slots * n + new_call_rows
+            # Hour to second; a handed over call crosses the whole cell
+            direction = direction[admitted]
+            position = np.where(new_call, self.arrival_position[admitted_rows], 0)
+            distance = np.where(new_call & (direction == Event.LEFT), position, self.cell_length - position)
+            admitted_station = station[admitted]
+            self.schedule_next(admitted_rows, admitted_event, admitted_time, admitted_station,
+                               admitted_station + step[admitted], duration, distance / speed * 3600, direction,
+                               speed)
+        # Only one arrival is pending at a time: schedule the next one when the current call comes in
+        if len(arrival_rows) > 0:
+            self.schedule_arrivals(arrival_rows, time[is_arrival])
+        # Update statistics
+        if self.record_interval > 1:
+            rows = rows[self.no_call_created[rows] % self.record_interval == 0]
+        no_call_created = self.no_call_created[rows]
+        point = rows * self.drop_rate_series.shape[1] + no_call_created // self.record_interval
+        self.drop_rate_series.reshape(-1)[point] = self.no_dropped_call[rows] / no_call_created * 100
+        self.block_rate_series.reshape(-1)[point] = self.no_blocked_call[rows] / no_call_created * 100
+
+    def schedule_next(self, rows: np.ndarray, event: np.ndarray, time: np.ndarray, station: np.ndarray,
+                      next_station: np.ndarray, duration: np.ndarray, time_to_handover: np.ndarray,
+                      direction: np.ndarray, speed: np.ndarray):
+        """
+        Vectorized Simulator.schedule_next into the flat event indices event: terminate the call, let it leave the
+        highway, or plan its next handover
+        """
+        finishing = duration <= time_to_handover
+        handover = ~finishing & (next_station != 0) & (next_station <= self.no_stations)
+        self.times.reshape(-1)[event] = time + np.where(finishing, duration, time_to_handover)
+        self.seqs.reshape(-1)[event] = self.sequence[rows]
+        self.sequence[rows] += 1
+        self.event_type.reshape(-1)[event] = np.where(handover, Event.HANDOVER, Event.TERMINATION)
+        self.event_station.reshape(-1)[event] = np.where(handover, next_station, station)
+        self.event_duration.reshape(-1)[event] = np.where(handover, duration - time_to_handover, 0)
+        self.event_direction.reshape(-1)[event] = direction
+        self.event_speed.reshape(-1)[event] = speed
+
+    def schedule_arrivals(self, rows: np.ndarray, time: np.ndarray):
+        """
+        Put the next arrival of each replication in rows, if its stream has any left, in slot 0
+        """
+        empty = self.arrival_offset[rows] == self.no_buffered_arrivals[rows]
+        if empty.any():
+            self.fill_arrivals(rows[empty])
+            left = self.no_buffered_arrivals[rows] > 0
+            rows = rows[left]
+            time = time[left]
+        arrival = rows * self.chunk_size + self.arrival_offset[rows]
+        self.arrival_offset[rows] += 1
+        self.times[0, rows] = time + self.arrivals["inter_arrival_time"].reshape(-1)[arrival]
+        self.seqs[0, rows] = self.sequence[rows]
+        self.sequence[rows] += 1
+        self.event_type[0, rows] = Event.INITIALIZATION
+        for name in ("station", "duration", "direction", "speed"):
+            getattr(self, "event_" + name)[0][rows] = self.arrivals[name].reshape(-1)[arrival]
+        self.arrival_position[rows] = self.arrivals["position"].reshape(-1)[arrival]
+
+    def fill_arrivals(self, rows: np.ndarray):
+        for r in rows.tolist():
+            if len(self.pending_arrivals[r]) == 0:
+                arrivals = self.arrival_streams[r].next_array()
+                if np.any((arrivals["direction"] != Event.LEFT) & (arrivals["direction"] != Event.RIGHT)):
+                    raise Exception("Unknown direction")
+                self.pending_arrivals[r] = arrivals
+            chunk = self.pending_arrivals[r][:self.chunk_size]
+            self.pending_arrivals[r] = self.pending_arrivals[r][self.chunk_size:]
+            for name, column in self.arrivals.items():
+                column[r, :len(chunk)] = chunk[name]
+            self.arrival_offset[r] = 0
+            self.no_buffered_arrivals[r] = len(chunk)
+
+    def mark_warm_up(self, rows: np.ndarray):
+        busy_area, full_area = self.station_areas(rows)
+        for i, r in enumerate(rows.tolist()):
+            self.statistics[r].mark_warm_up(int(self.no_dropped_call[r]), int(self.no_blocked_call[r]))
+            self.statistics[r].mark_station_warm_up(float(self.clock[r]), busy_area[i], full_area[i])
+
+    def station_areas(self, rows: np.ndarray = None):
+        """
+        Busy channel-seconds and seconds at full capacity of every station of the replications in rows (default
+        all), see Simulator.station_areas
+        """
+        rows = rows if rows is not None else np.arange(len(self.indices))
+        no_free_channel = self.no_free_channel[rows]
+        clock = self.clock[rows, None]
+        busy_area = (self.release_time_sum[rows] - self.allocation_time_sum[rows] +
+                     (self.no_channels - no_free_channel) * clock)
+        full_area = self.full_end_time_sum[rows] - self.full_start_time_sum[rows] + (no_free_channel == 0) * clock
+        return busy_area, full_area
+
+    def station_statistics(self):
+        """
+        Simulator.station_statistics of every replication, in order
+        """
+        busy_area, full_area = self.station_areas()
+        return [statistics.station_measures(float(self.clock[r]), busy_area[r], full_area[r], self.no_channels)
+                for r, statistics in enumerate(self.statistics)]
+
+    def finish(self):
+        """
+        Update the analyzer and return the drop and block rates of every replication, in order
+        """
+        station_statistics = self.station_statistics()
+        drop_rate_list = []
+        block_rate_list = []
+        for r, index in enumerate(self.indices):
+            if self.output_analyzer is not None:
+                self.output_analyzer.update_data(index, self.drop_rate_series[r], self.block_rate_series[r])
+                self.output_analyzer.update_station_data(index, station_statistics[r])
+            print("{} blocked, {} dropped, {} terminated".format(self.no_blocked_call[r], self.no_dropped_call[r],
+                                                                 self.no_terminated_call[r]))
+            drop_rate, block_rate = self.statistics[r].rates(int(self.no_call_created[r]),
+                                                             int(self.no_dropped_call[r]),
+                                                             int(self.no_blocked_call[r]))
+            drop_rate_list.append(drop_rate)
+            block_rate_list.append(block_rate)
+        return drop_rate_list, block_rate_list
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import unittest
+import numpy as np
+from libs.arrival_stream import ArrivalStream, CachedArrivalStream, StochasticArrivalStream
+from libs.batch_simulator import BatchSimulator
+from libs.output_analysis import OutputAnalyzer
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.runner import ReplicationRunner
+from libs.simulator import Simulator
+
+
+class TestBatchSimulator(unittest.TestCase):
+    def assert_same_as_simulator(self, arrivals: [np.ndarray], no_events_total: int, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            batch = BatchSimulator(range(len(arrivals)), no_events_total, None,
+                                   arrival_streams=[CachedArrivalStream(a) for a in arrivals], **kwargs)
+            drop_rate_list, block_rate_list = batch.run()
+            station_statistics = batch.station_statistics()
+            for r, a in enumerate(arrivals):
+                simulator = Simulator(r, no_events_total, None, arrival_stream=CachedArrivalStream(a), **kwargs)
+                self.assertEqual(simulator.run(), (drop_rate_list[r], block_rate_list[r]))
+                self.assertEqual(simulator.statistics.drop_rate_series.tolist(), batch.drop_rate_series[r].tolist())
+                self.assertEqual(simulator.statistics.block_rate_series.tolist(),
+                                 batch.block_rate_series[r].tolist())
+                for name, measure in simulator.station_statistics().items():
+                    self.assertEqual(measure.tolist(), station_statistics[r][name].tolist())
+                self.assertEqual(simulator.clock, batch.clock[r])
+                self.assertEqual(simulator.no_terminated_call, batch.no_terminated_call[r])
+        return batch
+
+    def test_same_results_as_simulator(self):
+        arrivals = [CachedArrivalStream.record(StochasticArrivalStream(RNG(seed), no_calls=2000))
+                    for seed in RNG.spawn_seeds(11, 6)]
+        batch = self.assert_same_as_simulator(arrivals, 2000, no_reserved=1, warm_up_events=200, record_interval=7)
+        self.assertGreater(batch.no_dropped_call.min(), 0)
+
+    def test_ties_are_broken_as_in_simulator(self):
+        # Whole seconds everywhere, so that many events of a replication fall on the same time
+        rng = np.random.default_rng(5)
+        arrivals = []
+        for _ in range(4):
+            a = np.zeros(1500, dtype=ArrivalStream.DTYPE)
+            a["inter_arrival_time"] = rng.integers(0, 2, len(a))
+            a["station"] = rng.integers(1, 21, len(a))
+            a["duration"] = rng.integers(1, 300, len(a))
+            a["direction"] = rng.integers(0, 2, len(a))
+            a["speed"] = 1800
+            a["position"] = rng.integers(0, 3, len(a))
+            arrivals.append(a)
+        batch = self.assert_same_as_simulator(arrivals, 1500, no_reserved=2, warm_up_events=100)
+        self.assertGreater(batch.no_blocked_call.min(), 0)
+
+    def test_next_array_cuts_chunks_like_iteration(self):
+        iterated = StochasticArrivalStream(RNG(3), no_calls=25, chunk_size=10)
+        arrays = StochasticArrivalStream(RNG(3), no_calls=25, chunk_size=10)
+        expected = [next(iterated) for _ in range(25)]
+        first = next(arrays)
+        chunks = [arrays.next_array() for _ in range(4)]
+        self.assertEqual([9, 10, 5, 0], [len(chunk) for chunk in chunks])
+        self.assertEqual(expected, [first] + np.concatenate(chunks).tolist())
+        self.assertEqual(iterated.input_sums.tolist(), arrays.input_sums.tolist())
+
+    def test_runner_batches_give_same_results(self):
+        results = []
+        for batch_size in (None, 4):
+            output_analyzer = OutputAnalyzer(500, no_iteration=6)
+            runner = ReplicationRunner(no_events_total=500, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                       max_workers=1, batch_size=batch_size, antithetic=True)
+            with contextlib.redirect_stdout(io.StringIO()):
+                rates = runner.run(6)
+            results.append((rates, output_analyzer.block_rate_mean.tolist(),
+                            output_analyzer.station_mean["utilization"].tolist()))
+        self.assertEqual(results[0], results[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
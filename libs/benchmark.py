@@ -0,0 +1,189 @@
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+from libs.trace_store import TraceStore
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+import numpy as np
+
+
+def run_case(mode: str, no_events_total: int, intensity: float, no_reserved: int, scheduler: str, seed: int,
+             trace_path: str = "./data.csv", sample_interval: int = 1000):
+    """
+    Time one simulation and measure its memory; module level so that it can run in a fresh process
+    """
+    baseline_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Intensity scales the arrival rate of the stochastic mode; a trace is replayed as recorded
+    parameters = {"INTER_ARRIVAL_TIME_BETA": RNG.INTER_ARRIVAL_TIME_BETA / intensity}
+    simulator = Simulator(index=0, no_events_total=no_events_total, output_analyzer=None, no_reserved=no_reserved,
+                          stochastic=mode == "stochastic", rng=RNG(seed, parameters), scheduler=scheduler,
+                          record_interval=no_events_total, trace_path=trace_path)
+    max_event_list_size = 0
+    start = time.perf_counter()
+    # The event list is sampled every sample_interval calls rather than after every event to keep the loop untouched
+    for limit in range(sample_interval, no_events_total + sample_interval, sample_interval):
+        simulator.advance(min(limit, no_events_total))
+        max_event_list_size = max(max_event_list_size, len(simulator.event_list))
+        if simulator.no_call_created < min(limit, no_events_total):
+            break
+    seconds = time.perf_counter() - start
+    # Every scheduled event took a sequence number; the ones still pending were not processed
+    no_events = next(simulator.sequence) - len(simulator.event_list)
+    no_call_created = simulator.no_call_created
+    drop_rate = simulator.no_dropped_call / float(no_call_created) * 100
+    block_rate = simulator.no_blocked_call / float(no_call_created) * 100
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "mode": mode,
+        "no_events_total": no_events_total,
+        "intensity": intensity,
+        "no_reserved": no_reserved,
+        "scheduler": scheduler,
+        "no_calls": no_call_created,
+        "no_events": no_events,
+        "seconds": seconds,
+        "events_per_second": no_events / seconds if seconds > 0 else float("inf"),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_memory_mb": max(0, peak_memory - baseline_memory) / 1024.,
+        "max_event_list_size": max_event_list_size,
+        "drop_rate": drop_rate,
+        "block_rate": block_rate,
+    }
+
+
+def case_worker(connection, kwargs: dict):
+    connection.send(run_case(**kwargs))
+    connection.close()
+
+
+class Benchmark:
+    """
+    Throughput and memory of Simulator over a grid of run lengths, traffic intensities, no_reserved values,
+    modes and schedulers. Each case runs in its own process by default so that peak memory is not inherited from
+    the previous case. Results are written as JSON and can be compared against a baseline file
+    """
+    KEY = ("mode", "no_events_total", "intensity", "no_reserved", "scheduler")
+
+    def __init__(self, no_events_total_list: [int] = (10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7),
+                 intensity_list: [float] = (0.5, 1.0, 2.0),
+                 no_reserved_list: [int] = (0, 1),
+                 modes: [str] = ("stochastic", "trace"),
+                 schedulers: [str] = ("heap",),
+                 seed: int = 4015,
+                 trace_path: str = "./data.csv",
+                 repeat: int = 1,
+                 isolate: bool = True):
+        self.no_events_total_list = no_events_total_list
+        self.intensity_list = intensity_list
+        self.no_reserved_list = no_reserved_list
+        self.modes = modes
+        self.schedulers = schedulers
+        self.seed = seed
+        self.trace_path = trace_path
+        # Each case runs repeat times and keeps its fastest run
+        self.repeat = repeat
+        self.isolate = isolate
+        self.results = []
+
+    def cases(self):
+        trace_length = len(TraceStore.load(self.trace_path)["inter_arrival_time"]) if "trace" in self.modes else 0
+        cases = []
+        for mode, no_events_total, intensity, no_reserved, scheduler in itertools.product(
+                self.modes, self.no_events_total_list, self.intensity_list, self.no_reserved_list, self.schedulers):
+            if mode == "trace":
+                # A trace has a fixed rate and length: replay it at intensity 1, capped at its number of calls
+                if intensity != 1.0:
+                    continue
+                no_events_total = min(no_events_total, trace_length)
+            case = dict(mode=mode, no_events_total=no_events_total, intensity=intensity, no_reserved=no_reserved,
+                        scheduler=scheduler, seed=self.seed, trace_path=self.trace_path)
+            if case not in cases:
+                cases.append(case)
+        return cases
+
+    def run(self):
+        self.results = []
+        for case in self.cases():
+            runs = [self.run_isolated(case) if self.isolate else run_case(**case) for _ in range(self.repeat)]
+            self.results.append(max(runs, key=lambda result: result["events_per_second"]))
+        return self.results
+
+    @classmethod
+    def run_isolated(cls, case: dict):
+        connection, child_connection = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=case_worker, args=(child_connection, case))
+        process.start()
+        result = connection.recv()
+        process.join()
+        return result
+
+    @classmethod
+    def environment(cls):
+        return {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def write_json(self, path: str):
+        with open(path, "w") as f:
+            json.dump({"environment": self.environment(), "results": self.results}, f, indent=2)
+
+    @classmethod
+    def load_json(cls, path: str):
+        with open(path) as f:
+            return json.load(f)["results"]
+
+    @classmethod
+    def compare(cls, baseline: [dict], results: [dict], tolerance: float = 0.1):
+        """
+        Cases whose throughput fell, or whose peak memory or event list grew, by more than tolerance (relative)
+        compared with the baseline, as (key, metric, baseline value, new value)
+        """
+        baseline = {tuple(result[name] for name in cls.KEY): result for result in baseline}
+        regressions = []
+        for result in results:
+            key = tuple(result[name] for name in cls.KEY)
+            if key not in baseline:
+                continue
+            old = baseline[key]
+            if result["events_per_second"] < old["events_per_second"] * (1 - tolerance):
+                regressions.append((key, "events_per_second", old["events_per_second"], result["events_per_second"]))
+            for metric in ("peak_memory_mb", "max_event_list_size"):
+                # Growth of up to one megabyte or one entry is measurement noise
+                if result[metric] > max(old[metric] * (1 + tolerance), old[metric] + 1):
+                    regressions.append((key, metric, old[metric], result[metric]))
+        return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the simulation engine")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7])
+    parser.add_argument("--intensities", type=float, nargs="+", default=[0.5, 1.0, 2.0])
+    parser.add_argument("--reserved", type=int, nargs="+", default=[0, 1])
+    parser.add_argument("--modes", nargs="+", default=["stochastic", "trace"])
+    parser.add_argument("--schedulers", nargs="+", default=["heap"])
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--output", default="./benchmark.json")
+    parser.add_argument("--baseline", help="Earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    args = parser.parse_args()
+    benchmark = Benchmark(args.lengths, args.intensities, args.reserved, args.modes, args.schedulers,
+                          repeat=args.repeat)
+    for result in benchmark.run():
+        print("{mode:10} {no_calls:>9} calls  intensity {intensity:<4} reserved {no_reserved}  {scheduler:8} "
+              "{events_per_second:>10.0f} events/s  {peak_memory_mb:>7.1f} MB  "
+              "event list {max_event_list_size}".format(**result))
+    benchmark.write_json(args.output)
+    if args.baseline is not None:
+        regressions = Benchmark.compare(Benchmark.load_json(args.baseline), benchmark.results, args.tolerance)
+        for key, metric, old, new in regressions:
+            print("Regression in {}: {} {:.1f} -> {:.1f}".format(dict(zip(Benchmark.KEY, key)), metric, old, new))
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,34 @@
+import unittest
+from libs.benchmark import Benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_measures_every_case(self):
+        benchmark = Benchmark(no_events_total_list=(2000, 10 ** 6), intensity_list=(1.0, 2.0), no_reserved_list=(0,),
+                              modes=("stochastic",), isolate=False)
+        cases = benchmark.cases()
+        self.assertEqual(4, len(cases))
+        benchmark.no_events_total_list = (2000,)
+        results = benchmark.run()
+        self.assertEqual([2000, 2000], [result["no_calls"] for result in results])
+        # Twice the arrival rate keeps more calls in progress
+        self.assertGreater(results[1]["max_event_list_size"], results[0]["max_event_list_size"])
+        self.assertTrue(all(result["no_events"] > result["no_calls"] for result in results))
+
+    def test_trace_cases_are_capped_at_the_trace(self):
+        benchmark = Benchmark(no_events_total_list=(10 ** 5, 10 ** 6), intensity_list=(1.0, 2.0),
+                              no_reserved_list=(0,), modes=("trace",), isolate=False)
+        self.assertEqual([10000], [case["no_events_total"] for case in benchmark.cases()])
+
+    def test_compare_flags_regressions(self):
+        baseline = [{"mode": "stochastic", "no_events_total": 1000, "intensity": 1.0, "no_reserved": 0,
+                     "scheduler": "heap", "events_per_second": 1000., "peak_memory_mb": 10., "max_event_list_size": 90}]
+        faster = [dict(baseline[0], events_per_second=1200.)]
+        slower = [dict(baseline[0], events_per_second=800., peak_memory_mb=20.)]
+        self.assertEqual([], Benchmark.compare(baseline, faster))
+        self.assertEqual(["events_per_second", "peak_memory_mb"],
+                         [metric for _, metric, _, _ in Benchmark.compare(baseline, slower)])
+
+
+if __name__ == '__main__':
+    unittest.main()
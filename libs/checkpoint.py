@@ -0,0 +1,139 @@
+from libs.arrival_stream import CachedArrivalStream, StochasticArrivalStream, TraceArrivalStream
+from libs.empirical import EmpiricalRandomNumberGenerator as EmpiricalRNG
+from libs.output_analysis import OutputAnalyzer
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+import itertools
+import json
+import numpy as np
+
+
+class Checkpoint:
+    """
+    Snapshot of the complete state of a Simulator in one compressed .npz file: pending events and the unconsumed
+    part of the arrival stream as structured arrays, channel counts, occupancy sums and rate series as arrays, and
+    the clock, counters, generator state and stream position as JSON metadata.
+    Restoring a snapshot and running it gives exactly the same results as the uninterrupted run
+    """
+    EVENT_DTYPE = np.dtype([("arrival_time", np.float64), ("seq", np.int64), ("event_type", np.int8),
+                            ("station", np.int32), ("duration", np.float64), ("direction", np.int8),
+                            ("speed", np.float64), ("position", np.float64)])
+    # Per-station occupancy sums of Simulator
+    TIME_SUMS = ("allocation_time_sum", "release_time_sum", "full_start_time_sum", "full_end_time_sum")
+
+    @classmethod
+    def save(cls, simulator: Simulator, path: str):
+        stream = simulator.arrival_stream
+        if type(stream) not in (StochasticArrivalStream, TraceArrivalStream):
+            raise Exception("Unsupported arrival stream")
+        # Empirical generators are rebuilt from the trace they were built from
+        empirical = type(simulator.rng) is EmpiricalRNG and simulator.rng.trace_path is not None
+        if type(simulator.rng) is not RNG and not empirical:
+            raise Exception("Unsupported generator")
+        # Read the sequence counter by consuming its next value, then put it back
+        seq = next(simulator.sequence)
+        simulator.sequence = itertools.count(seq)
+        meta = {
+            "no_events_total": simulator.no_events_total,
+            "no_reserved": simulator.no_reserved,
+            "warm_up_events": simulator.warm_up_events,
+            "stochastic": simulator.stochastic,
+            "scheduler": simulator.scheduler,
+            "record_interval": simulator.record_interval,
+            "trace_path": simulator.trace_path,
+            "no_channels": simulator.no_channels,
+            "no_stations": simulator.no_stations,
+            "cell_length": simulator.cell_length,
+            "clock": simulator.clock,
+            "seq": seq,
+            "started": simulator.started,
+            "no_call_created": simulator.no_call_created,
+            "no_dropped_call": simulator.no_dropped_call,
+            "no_blocked_call": simulator.no_blocked_call,
+            "no_handover_call": simulator.no_handover_call,
+            "no_terminated_call": simulator.no_terminated_call,
+            "no_dropped_call_at_warm_up": simulator.statistics.no_dropped_call_at_warm_up,
+            "no_blocked_call_at_warm_up": simulator.statistics.no_blocked_call_at_warm_up,
+            "time_at_warm_up": simulator.statistics.time_at_warm_up,
+            "parameters": {name: getattr(simulator.rng, name) for name in RNG.PARAMETERS},
+            "rng_state": simulator.rng.generator.bit_generator.state,
+            "inversion": simulator.rng.inversion,
+            "antithetic": simulator.rng.antithetic,
+            "empirical": {"trace_path": simulator.rng.trace_path,
+                          "table_size": simulator.rng.table_size} if empirical else None,
+            "no_calls": stream.no_calls,
+            "chunk_size": stream.chunk_size,
+            "no_generated": stream.no_generated,
+            "input_sums": stream.input_sums.tolist() if hasattr(stream, "input_sums") else None,
+        }
+        np.savez_compressed(path,
+                            meta=np.array(json.dumps(meta)),
+                            events=np.array(simulator.event_list.entries(), dtype=cls.EVENT_DTYPE),
+                            arrivals=np.array(stream.chunk[stream.offset:], dtype=CachedArrivalStream.DTYPE),
+                            no_free_channel=np.array(simulator.no_free_channel),
+                            busy_area_at_warm_up=np.broadcast_to(simulator.statistics.busy_area_at_warm_up,
+                                                                 len(simulator.no_free_channel)),
+                            full_area_at_warm_up=np.broadcast_to(simulator.statistics.full_area_at_warm_up,
+                                                                 len(simulator.no_free_channel)),
+                            **{name: np.array(getattr(simulator, name)) for name in cls.TIME_SUMS},
+                            drop_rate_series=simulator.statistics.drop_rate_series,
+                            block_rate_series=simulator.statistics.block_rate_series)
+
+    @classmethod
+    def load(cls, path: str, index: int = 0, output_analyzer: OutputAnalyzer = None, seed=None):
+        """
+        Restore a Simulator. With a seed, the generator is reseeded after the restore (and the arrivals already
+        drawn but not yet used are dropped), which forks an independent continuation of the snapshot
+        """
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("empirical") is not None:
+                rng = EmpiricalRNG.from_trace(meta["empirical"]["trace_path"],
+                                              table_size=meta["empirical"]["table_size"],
+                                              antithetic=meta["antithetic"])
+                rng.CELL_LENGTH = meta["parameters"]["CELL_LENGTH"]
+            else:
+                rng = RNG(parameters=meta["parameters"], inversion=meta["inversion"], antithetic=meta["antithetic"])
+            rng.generator.bit_generator.state = meta["rng_state"]
+            if meta["stochastic"]:
+                stream = StochasticArrivalStream(rng, no_calls=meta["no_calls"], chunk_size=meta["chunk_size"])
+                stream.input_sums[:] = meta["input_sums"]
+            else:
+                stream = TraceArrivalStream(rng, path=meta["trace_path"], no_calls=meta["no_calls"],
+                                            chunk_size=meta["chunk_size"])
+            stream.no_generated = meta["no_generated"]
+            stream.chunk = data["arrivals"].tolist()
+            simulator = Simulator(index=index, no_events_total=meta["no_events_total"],
+                                  output_analyzer=output_analyzer, no_reserved=meta["no_reserved"],
+                                  warm_up_events=meta["warm_up_events"], stochastic=meta["stochastic"], rng=rng,
+                                  scheduler=meta["scheduler"], record_interval=meta["record_interval"],
+                                  arrival_stream=stream, trace_path=meta["trace_path"],
+                                  no_channels=meta["no_channels"], no_stations=meta["no_stations"],
+                                  cell_length=meta["cell_length"])
+            for entry in data["events"].tolist():
+                simulator.event_list.push(entry)
+            simulator.no_free_channel = data["no_free_channel"].tolist()
+            for name in cls.TIME_SUMS:
+                setattr(simulator, name, data[name].tolist())
+            simulator.statistics.mark_station_warm_up(meta["time_at_warm_up"], data["busy_area_at_warm_up"],
+                                                      data["full_area_at_warm_up"])
+            simulator.statistics.drop_rate_series[:] = data["drop_rate_series"]
+            simulator.statistics.block_rate_series[:] = data["block_rate_series"]
+        simulator.statistics.mark_warm_up(meta["no_dropped_call_at_warm_up"], meta["no_blocked_call_at_warm_up"])
+        simulator.sequence = itertools.count(meta["seq"])
+        simulator.clock = meta["clock"]
+        simulator.started = meta["started"]
+        for name in ("no_call_created", "no_dropped_call", "no_blocked_call", "no_handover_call",
+                     "no_terminated_call"):
+            setattr(simulator, name, meta[name])
+        if seed is not None:
+            rng.generator = np.random.default_rng(seed)
+            stream.discard_chunk()
+        return simulator
+
+    @classmethod
+    def fork(cls, path: str, n: int, seed=None):
+        """
+        n independent continuations of one snapshot, e.g. replications sharing a single warm-up
+        """
+        return [cls.load(path, index=i, seed=child) for i, child in enumerate(RNG.spawn_seeds(seed, n))]
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from libs.arrival_stream import StochasticArrivalStream
+from libs.checkpoint import Checkpoint
+from libs.empirical import EmpiricalRandomNumberGenerator as EmpiricalRNG
+from libs.output_analysis import OutputAnalyzer
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.runner import ReplicationRunner, run_forked_replication
+from libs.simulator import Simulator
+
+
+class TestCheckpoint(unittest.TestCase):
+    def test_resume_matches_uninterrupted_run(self):
+        uninterrupted = Simulator(index=0, no_events_total=3000, output_analyzer=None, no_reserved=1,
+                                  warm_up_events=500, rng=RNG(9))
+        expected = uninterrupted.run()
+        simulator = Simulator(index=0, no_events_total=3000, output_analyzer=None, no_reserved=1,
+                              warm_up_events=500, rng=RNG(9))
+        simulator.advance(1200)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "snapshot.npz")
+            Checkpoint.save(simulator, path)
+            resumed = Checkpoint.load(path)
+            self.assertEqual(expected, resumed.run())
+            self.assertEqual(uninterrupted.station_statistics()["full"].tolist(),
+                             resumed.station_statistics()["full"].tolist())
+            forks = [fork.run() for fork in Checkpoint.fork(path, 2, seed=1)]
+        self.assertNotEqual(forks[0], forks[1])
+
+    def test_discarded_arrivals_leave_the_input_sums(self):
+        stream = StochasticArrivalStream(RNG(4), no_calls=100, chunk_size=30)
+        consumed = np.array([next(stream) for _ in range(45)], dtype=StochasticArrivalStream.DTYPE)
+        stream.discard_chunk()
+        self.assertEqual(45, stream.no_generated)
+        expected = [consumed["inter_arrival_time"].sum(), consumed["duration"].sum(), consumed["speed"].sum()]
+        self.assertTrue(np.allclose(expected, stream.input_sums))
+
+    def test_forked_replications_estimate_on_their_own_inputs(self):
+        output_analyzer = OutputAnalyzer(10000, no_iteration=6)
+        runner = ReplicationRunner(no_events_total=10000, no_reserved=1, output_analyzer=output_analyzer, seed=2,
+                                   max_workers=1, warm_up_events=500, control_variates=True)
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            path = os.path.join(directory, "snapshot.npz")
+            runner.save_warm_up(path)
+            runner.run_from_snapshot(6, path)
+        self.assertEqual({"drop_rate", "block_rate"}, set(runner.estimates))
+        for input_means in runner.input_means:
+            self.assertTrue(np.allclose(RNG().input_means(), input_means, rtol=0.05))
+
+    def test_forks_do_not_reuse_pilot_streams(self):
+        output_analyzer = OutputAnalyzer(1000, no_iteration=4)
+        runner = ReplicationRunner(no_events_total=1000, no_reserved=1, output_analyzer=output_analyzer, seed=2,
+                                   max_workers=1, warm_up_events=None, pilot_iteration=3)
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()), \
+                mock.patch.object(runner, "detect_warm_up", wraps=runner.detect_warm_up) as detect_warm_up, \
+                mock.patch("libs.runner.run_forked_replication", wraps=run_forked_replication) as fork:
+            path = os.path.join(directory, "snapshot.npz")
+            runner.save_warm_up(path)
+            runner.run_from_snapshot(4, path)
+        pilots = [seed.spawn_key for seed in detect_warm_up.call_args[0][0]]
+        forks = [call[0][2].spawn_key for call in fork.call_args_list]
+        self.assertEqual(3, len(pilots))
+        self.assertEqual(4, len(set(forks)))
+        self.assertFalse(set(pilots) & set(forks))
+
+    def test_empirical_generator_is_restored(self):
+        uninterrupted = Simulator(index=0, no_events_total=3000, output_analyzer=None, no_reserved=1,
+                                  warm_up_events=500, rng=EmpiricalRNG.from_trace(seed=9))
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = uninterrupted.run()
+            simulator = Simulator(index=0, no_events_total=3000, output_analyzer=None, no_reserved=1,
+                                  warm_up_events=500, rng=EmpiricalRNG.from_trace(seed=9))
+            simulator.advance(1200)
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "snapshot.npz")
+                Checkpoint.save(simulator, path)
+                resumed = Checkpoint.load(path)
+                self.assertIsInstance(resumed.rng, EmpiricalRNG)
+                self.assertEqual(expected, resumed.run())
+
+    def test_forks_of_an_empirical_runner_draw_from_the_trace_tables(self):
+        output_analyzer = OutputAnalyzer(10000, no_iteration=6)
+        runner = ReplicationRunner(no_events_total=10000, no_reserved=1, output_analyzer=output_analyzer, seed=2,
+                                   max_workers=1, warm_up_events=500, control_variates=True, empirical=True)
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            path = os.path.join(directory, "snapshot.npz")
+            runner.save_warm_up(path)
+            runner.run_from_snapshot(6, path)
+        control_means = EmpiricalRNG.from_trace().input_means()
+        for input_means in runner.input_means:
+            self.assertTrue(np.allclose(control_means, input_means, rtol=0.05))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.trace_store import TraceStore
+import numpy as np
+
+
+class AliasTable:
+    """
+    Walker's alias method (Vose's construction) for a discrete distribution over values[0 ... n - 1]: one uniform
+    picks a column and, through its fractional part, either the column's own value or its alias
+    """
+
+    def __init__(self, values, weights):
+        self.values = np.asarray(values)
+        n = len(self.values)
+        probability = np.asarray(weights, dtype=float) * n / float(np.sum(weights))
+        self.probability = np.ones(n)
+        self.alias = np.arange(n)
+        small = [i for i in range(n) if probability[i] < 1]
+        large = [i for i in range(n) if probability[i] >= 1]
+        while small and large:
+            i = small.pop()
+            j = large.pop()
+            self.probability[i] = probability[i]
+            self.alias[i] = j
+            probability[j] -= 1 - probability[i]
+            (small if probability[j] < 1 else large).append(j)
+        # Columns left over are full up to rounding
+
+    def sample(self, u: np.ndarray):
+        x = u * len(self.values)
+        column = np.minimum(x.astype(np.int64), len(self.values) - 1)
+        return self.values[np.where(x - column < self.probability[column], column, self.alias[column])]
+
+
+class InverseCdfTable:
+    """
+    Piecewise linear empirical distribution: the quantiles of the data at table_size + 1 equally spaced
+    probabilities, interpolated linearly in between
+    """
+
+    def __init__(self, data, table_size: int = 1000):
+        self.table_size = table_size
+        self.quantiles = np.quantile(np.asarray(data, dtype=float), np.linspace(0, 1, table_size + 1))
+
+    def sample(self, u: np.ndarray):
+        x = u * self.table_size
+        i = np.minimum(x.astype(np.int64), self.table_size - 1)
+        return self.quantiles[i] + (x - i) * (self.quantiles[i + 1] - self.quantiles[i])
+
+    def mean(self):
+        return float(np.mean((self.quantiles[:-1] + self.quantiles[1:]) / 2))
+
+
+class EmpiricalRandomNumberGenerator(RNG):
+    """
+    Generator that bootstraps unlimited traffic from a recorded trace instead of the parametric fits: base stations
+    from an alias table of their frequencies, inter-arrival times, durations and speeds from inverse-cdf tables.
+    Tables are built once; afterwards every variate costs O(1) and takes exactly one uniform, so antithetic pairs
+    work as with RandomNumberGenerator(inversion=True). Directions and positions are not in the trace and keep
+    their uniform distributions
+    """
+
+    def __init__(self, seed=None, inter_arrival_time_list=(), base_station_list=(), duration_list=(),
+                 speed_list=(), table_size: int = 1000, antithetic: bool = False):
+        super().__init__(seed, inversion=True, antithetic=antithetic)
+        stations, counts = np.unique(np.asarray(base_station_list, dtype=np.int16), return_counts=True)
+        self.BASE_STATION_MIN = int(stations[0])
+        self.BASE_STATION_MAX = int(stations[-1])
+        self.base_station_table = AliasTable(stations, counts)
+        self.inter_arrival_time_table = InverseCdfTable(inter_arrival_time_list, table_size)
+        self.duration_table = InverseCdfTable(duration_list, table_size)
+        self.speed_table = InverseCdfTable(speed_list, table_size)
+        self.table_size = table_size
+        # Trace the tables were built from (see from_trace), which lets a Checkpoint rebuild them
+        self.trace_path = None
+
+    @classmethod
+    def from_trace(cls, path: str = "./data.csv", seed=None, table_size: int = 1000, antithetic: bool = False):
+        columns = TraceStore.load(path)
+        rng = cls(seed, columns["inter_arrival_time"], columns["base_station"], columns["duration"],
+                  columns["speed"], table_size, antithetic)
+        rng.trace_path = path
+        return rng
+
+    @classmethod
+    def from_input_analyzer(cls, input_analyzer, seed=None, table_size: int = 1000, antithetic: bool = False):
+        return cls(seed, input_analyzer.inter_arrival_time_list, input_analyzer.base_station_list,
+                   input_analyzer.duration_list, input_analyzer.speed_list, table_size, antithetic)
+
+    def input_means(self):
+        return np.array([self.inter_arrival_time_table.mean(), self.duration_table.mean(), self.speed_table.mean()])
+
+    def generate_inter_arrival_time(self):
+        return float(self.generate_inter_arrival_times(1)[0])
+
+    def generate_base_station(self):
+        return int(self.generate_base_stations(1)[0])
+
+    def generate_duration(self):
+        return float(self.generate_durations(1)[0])
+
+    def generate_speed(self):
+        return float(self.generate_speeds(1)[0])
+
+    def generate_inter_arrival_times(self, size: int):
+        return self.inter_arrival_time_table.sample(self.generate_uniforms(size))
+
+    def generate_base_stations(self, size: int):
+        return self.base_station_table.sample(self.generate_uniforms(size))
+
+    def generate_durations(self, size: int):
+        return self.duration_table.sample(self.generate_uniforms(size))
+
+    def generate_speeds(self, size: int):
+        return self.speed_table.sample(self.generate_uniforms(size))
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+from libs.empirical import AliasTable, EmpiricalRandomNumberGenerator, InverseCdfTable
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+
+
+class TestEmpirical(unittest.TestCase):
+    def test_alias_table_matches_weights(self):
+        table = AliasTable([3, 5, 7, 9], [1, 2, 3, 4])
+        u = np.random.default_rng(1).random(200000)
+        frequencies = np.bincount(table.sample(u), minlength=10)[[3, 5, 7, 9]] / 200000.
+        self.assertTrue(np.allclose([0.1, 0.2, 0.3, 0.4], frequencies, atol=0.005))
+
+    def test_inverse_cdf_table_interpolates_quantiles(self):
+        table = InverseCdfTable(np.arange(101.), table_size=10)
+        self.assertEqual([0., 5., 50., 100.], table.sample(np.array([0., 0.05, 0.5, 1.])).tolist())
+        self.assertAlmostEqual(50., table.mean())
+
+    def test_bootstraps_trace_beyond_its_length(self):
+        generator = np.random.default_rng(3)
+        durations = 10 + generator.exponential(100, 5000)
+        rng = EmpiricalRandomNumberGenerator(7, generator.exponential(1.4, 5000), generator.integers(1, 21, 5000),
+                                             durations, generator.normal(120, 9, 5000))
+        sample = rng.generate_durations(100000)
+        self.assertGreaterEqual(sample.min(), durations.min())
+        self.assertAlmostEqual(durations.mean(), sample.mean(), delta=1.5)
+        self.assertEqual((1, 20), (rng.BASE_STATION_MIN, rng.BASE_STATION_MAX))
+        simulator = Simulator(index=0, no_events_total=12000, output_analyzer=None, no_reserved=1, rng=rng)
+        simulator.run()
+        self.assertEqual(12000, simulator.no_call_created)
+
+    def test_antithetic_partner(self):
+        data = np.random.default_rng(4).exponential(1, 1000)
+        a = EmpiricalRandomNumberGenerator(1, data, [1, 2], data, data)
+        b = EmpiricalRandomNumberGenerator(1, data, [1, 2], data, data, antithetic=True)
+        self.assertIsInstance(a, RNG)
+        self.assertLess(np.corrcoef(a.generate_durations(1000), b.generate_durations(1000))[0, 1], -0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
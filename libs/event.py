@@ -1,4 +1,24 @@
+from libs.random_number_generator import RandomNumberGenerator as RNG
+
+
 class Event:
+    """
+    Readable view of an event. The simulator itself keeps events as plain tuples
+    (arrival_time, seq, event_type, station, duration, direction, speed, position) with integer codes,
+    which heapq orders natively by (arrival_time, seq) without calling back into Python
+    """
+    __slots__ = ("event_type", "arrival_time", "station", "duration", "position", "direction", "speed")
+
+    # Event type codes
+    INITIALIZATION = 0
+    HANDOVER = 1
+    TERMINATION = 2
+    EVENT_TYPES = ("INITIALIZATION", "HANDOVER", "TERMINATION")
+    # Direction codes, shared with RandomNumberGenerator
+    LEFT = RNG.LEFT
+    RIGHT = RNG.RIGHT
+    DIRECTIONS = RNG.DIRECTIONS
+
     def __init__(self, event_type: str, arrival_time: float, station: int, duration: float,
                  direction: str, speed: float, position: float = 0):
         self.event_type = event_type
@@ -9,6 +29,16 @@ class Event:
         self.direction = direction
         self.speed = speed
 
+    def to_entry(self, seq: int):
+        return (self.arrival_time, seq, self.EVENT_TYPES.index(self.event_type), self.station, self.duration,
+                self.DIRECTIONS.index(self.direction), self.speed, self.position)
+
+    @classmethod
+    def from_entry(cls, entry: tuple):
+        arrival_time, _, event_type, station, duration, direction, speed, position = entry
+        return cls(event_type=cls.EVENT_TYPES[event_type], arrival_time=arrival_time, station=station,
+                   duration=duration, direction=cls.DIRECTIONS[direction], speed=speed, position=position)
+
     def __gt__(self, other):
         return self.arrival_time > other.arrival_time
 
@@ -22,4 +52,4 @@ class Event:
         return self.arrival_time < other.arrival_time
 
     def __eq__(self, other):
-        return self.arrival_time == other.arrival_time
\ No newline at end of file
+        return self.arrival_time == other.arrival_time
@@ -0,0 +1,24 @@
+import heapq
+import unittest
+from libs.event import Event
+
+
+class TestEvent(unittest.TestCase):
+    def test_entry_round_trip(self):
+        event = Event(event_type="HANDOVER", arrival_time=3.5, station=4, duration=12.0, direction="LEFT",
+                      speed=110.0)
+        entry = event.to_entry(seq=0)
+        self.assertEqual((3.5, 0, Event.HANDOVER, 4, 12.0, Event.LEFT, 110.0, 0), entry)
+        restored = Event.from_entry(entry)
+        self.assertEqual(("HANDOVER", "LEFT", 4), (restored.event_type, restored.direction, restored.station))
+
+    def test_entries_ordered_by_time_then_sequence(self):
+        heap = []
+        for seq, time in enumerate([2.0, 1.0, 1.0]):
+            heapq.heappush(heap, Event(event_type="TERMINATION", arrival_time=time, station=1, duration=0,
+                                       direction="RIGHT", speed=100.0).to_entry(seq))
+        self.assertEqual([1, 2, 0], [heapq.heappop(heap)[1] for _ in range(3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import numpy as np
+
+
+class DistributionFitter:
+    """
+    Vectorized maximum-likelihood fits and goodness-of-fit tests for the input distributions. SciPy is imported by
+    the methods that need it, so that fitting alone stays light.
+    A fitted distribution is described by its family name and a dict of parameters:
+        exponential: beta (mean)
+        shifted_exponential: shift, beta (mean of the shifted data)
+        normal: mu, sigma_square
+        uniform: a, b (discrete, inclusive)
+    """
+
+    @classmethod
+    def fit(cls, family: str, data):
+        x = np.asarray(data, dtype=float)
+        if family == "exponential":
+            return {"beta": float(x.mean())}
+        elif family == "shifted_exponential":
+            shift = float(x.min())
+            return {"shift": shift, "beta": float(x.mean()) - shift}
+        elif family == "normal":
+            return {"mu": float(x.mean()), "sigma_square": float(x.var())}
+        elif family == "uniform":
+            return {"a": int(x.min()), "b": int(x.max())}
+        raise Exception("Unknown distribution")
+
+    @classmethod
+    def cdf(cls, family: str, parameters: dict, x):
+        x = np.asarray(x, dtype=float)
+        if family == "exponential":
+            return -np.expm1(-np.maximum(x, 0) / parameters["beta"])
+        elif family == "shifted_exponential":
+            return -np.expm1(-np.maximum(x - parameters["shift"], 0) / parameters["beta"])
+        elif family == "normal":
+            from scipy import stats
+            return stats.norm.cdf(x, parameters["mu"], np.sqrt(parameters["sigma_square"]))
+        elif family == "uniform":
+            a, b = parameters["a"], parameters["b"]
+            return np.clip((np.floor(x) - a + 1) / float(b - a + 1), 0, 1)
+        raise Exception("Unknown distribution")
+
+    @classmethod
+    def ppf(cls, family: str, parameters: dict, q):
+        q = np.asarray(q, dtype=float)
+        if family == "exponential":
+            return -parameters["beta"] * np.log1p(-q)
+        elif family == "shifted_exponential":
+            return parameters["shift"] - parameters["beta"] * np.log1p(-q)
+        elif family == "normal":
+            from scipy import stats
+            return stats.norm.ppf(q, parameters["mu"], np.sqrt(parameters["sigma_square"]))
+        raise Exception("Unknown distribution")
+
+    @classmethod
+    def chi_square_test(cls, family: str, parameters: dict, data, k: int = 100):
+        """
+        Chi-square statistic and p-value over k equiprobable intervals (one cell per value for uniform).
+        Bins are counted in one pass with searchsorted/bincount
+        """
+        x = np.asarray(data, dtype=float)
+        n = len(x)
+        if family == "uniform":
+            a, b = parameters["a"], parameters["b"]
+            k = b - a + 1
+            counts = np.bincount(np.clip(x.astype(np.int64) - a, 0, k - 1), minlength=k)
+        else:
+            endpoints = cls.ppf(family, parameters, np.arange(k) / float(k))
+            bins = np.clip(np.searchsorted(endpoints, x, side="right") - 1, 0, k - 1)
+            counts = np.bincount(bins, minlength=k)
+        from scipy import stats
+        expected = n / float(k)
+        chi_square = float(np.sum((counts - expected) ** 2) / expected)
+        return chi_square, float(stats.chi2.sf(chi_square, k - 1 - len(parameters)))
+
+    @classmethod
+    def ks_test(cls, family: str, parameters: dict, data):
+        """
+        Kolmogorov-Smirnov statistic and p-value against the fitted continuous distribution
+        """
+        from scipy import stats
+        x = np.sort(np.asarray(data, dtype=float))
+        n = len(x)
+        f = cls.cdf(family, parameters, x)
+        d = max(float(np.max(np.arange(1, n + 1) / float(n) - f)), float(np.max(f - np.arange(n) / float(n))))
+        return d, float(stats.kstwo.sf(d, n))
+
+    @classmethod
+    def fit_trace(cls, inter_arrival_time_list, base_station_list, duration_list, speed_list):
+        """
+        Fit every input and return the parameter set in the form RandomNumberGenerator(parameters=...) loads
+        """
+        inter_arrival_time = cls.fit("exponential", inter_arrival_time_list)
+        base_station = cls.fit("uniform", base_station_list)
+        duration = cls.fit("shifted_exponential", duration_list)
+        speed = cls.fit("normal", speed_list)
+        return {
+            "INTER_ARRIVAL_TIME_BETA": inter_arrival_time["beta"],
+            "BASE_STATION_MIN": base_station["a"],
+            "BASE_STATION_MAX": base_station["b"],
+            "DURATION_BETA": duration["beta"],
+            "DURATION_SHIFT": duration["shift"],
+            "SPEED_MU": speed["mu"],
+            "SPEED_SIGMA_SQUARE": speed["sigma_square"],
+        }
+
+    @classmethod
+    def save_parameters(cls, parameters: dict, path: str):
+        with open(path, "w") as f:
+            json.dump(parameters, f, indent=2)
+
+    @classmethod
+    def load_parameters(cls, path: str):
+        with open(path) as f:
+            return json.load(f)
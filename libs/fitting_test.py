@@ -0,0 +1,31 @@
+import math
+import unittest
+import numpy as np
+from libs.fitting import DistributionFitter
+from libs.random_number_generator import RandomNumberGenerator as RNG
+
+
+class TestDistributionFitter(unittest.TestCase):
+    def test_chi_square_matches_interval_counting(self):
+        x = np.random.default_rng(1).exponential(2.0, size=2000)
+        beta = DistributionFitter.fit("exponential", x)["beta"]
+        endpoints = [beta * math.log(1 / (1 - i * 0.05)) for i in range(20)] + [float("inf")]
+        counts = [sum(1 for v in x if endpoints[j] <= v < endpoints[j + 1]) for j in range(20)]
+        expected = sum((c - 100.0) ** 2 / 100.0 for c in counts)
+        chi_square, _ = DistributionFitter.chi_square_test("exponential", {"beta": beta}, x, k=20)
+        self.assertAlmostEqual(expected, chi_square)
+
+    def test_fitted_parameters_load_into_generator(self):
+        generator = np.random.default_rng(2)
+        parameters = DistributionFitter.fit_trace(generator.exponential(3.0, 5000),
+                                                  generator.integers(1, 20, 5000, endpoint=True),
+                                                  generator.exponential(50.0, 5000) + 5.0,
+                                                  generator.normal(100.0, 5.0, 5000))
+        self.assertAlmostEqual(50.0, parameters["DURATION_BETA"], delta=2.0)
+        rng = RNG(3, parameters)
+        self.assertAlmostEqual(parameters["DURATION_BETA"] + parameters["DURATION_SHIFT"],
+                               rng.generate_durations(100000).mean(), delta=1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
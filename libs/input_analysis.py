@@ -1,11 +1,10 @@
-import matplotlib.pyplot as plt
-import math
-import numpy as np
-from scipy import stats
+from libs.fitting import DistributionFitter
+from libs.trace_store import TraceStore
 
 
 class InputAnalyzer:
-    def __init__(self):
+    def __init__(self, path: str = "./data.csv"):
+        self.path = path
         self.inter_arrival_time_list = []
         self.base_station_list = []
         self.duration_list = []
@@ -14,134 +13,82 @@ class InputAnalyzer:
         self.read_from_file()
 
     def read_from_file(self):
-        # Read data from file
-        with open("./data.csv") as f:
-            lines = f.readlines()
-            last_arrival_time = 0
-            for line in lines:
-                line = line.rstrip().split(",")
-                arrival_time = float(line[1])
-                station = int(line[2])
-                duration = float(line[3])
-                speed = float(line[4])
-                inter_arrival_time = arrival_time - last_arrival_time
-                last_arrival_time = arrival_time
-                # Add to list
-                self.inter_arrival_time_list.append(inter_arrival_time)
-                self.base_station_list.append(station)
-                self.duration_list.append(duration)
-                self.speed_list.append(speed)
-                self.count += 1
+        # Columns are memory-mapped from the binary copy of the trace, which is only rebuilt if the CSV changed
+        columns = TraceStore.load(self.path)
+        self.inter_arrival_time_list = columns["inter_arrival_time"]
+        self.base_station_list = columns["base_station"]
+        self.duration_list = columns["duration"]
+        self.speed_list = columns["speed"]
+        self.count = len(self.inter_arrival_time_list)
 
-    def draw_histogram_iat(self):
-        plt.hist(x=self.inter_arrival_time_list)
-        plt.title("Inter-Arrival Time")
-        plt.xlabel("Seconds")
+    @staticmethod
+    def draw_histogram(data, title: str, xlabel: str):
+        # Imported here so that reading and fitting a trace does not load matplotlib
+        import matplotlib.pyplot as plt
+        plt.hist(x=data)
+        plt.title(title)
+        plt.xlabel(xlabel)
         plt.ylabel("Occurrences")
         plt.show()
 
+    def draw_histogram_iat(self):
+        self.draw_histogram(self.inter_arrival_time_list, "Inter-Arrival Time", "Seconds")
+
     def draw_histogram_base_station(self):
-        plt.hist(x=self.base_station_list)
-        plt.title("Base Station")
-        plt.xlabel("Station")
-        plt.ylabel("Occurrences")
-        plt.show()
+        self.draw_histogram(self.base_station_list, "Base Station", "Station")
 
     def draw_histogram_duration(self):
-        plt.hist(x=self.duration_list)
-        plt.title("Call Duration")
-        plt.xlabel("Seconds")
-        plt.ylabel("Occurrences")
-        plt.show()
+        self.draw_histogram(self.duration_list, "Call Duration", "Seconds")
 
     def draw_histogram_speed(self):
-        plt.hist(x=self.speed_list)
-        plt.title("Speed")
-        plt.xlabel("km/h")
-        plt.ylabel("Occurrences")
-        plt.show()
+        self.draw_histogram(self.speed_list, "Speed", "km/h")
 
     def calculate_parameters_iat(self):
-        return sum(self.inter_arrival_time_list) / float(self.count)
+        return DistributionFitter.fit("exponential", self.inter_arrival_time_list)["beta"]
 
     def calculate_parameters_base_station(self):
-        return min(self.base_station_list), max(self.base_station_list)
+        parameters = DistributionFitter.fit("uniform", self.base_station_list)
+        return parameters["a"], parameters["b"]
 
     def calculate_parameters_duration(self):
-        return sum(self.duration_list) / float(self.count)
+        parameters = DistributionFitter.fit("shifted_exponential", self.duration_list)
+        return parameters["shift"], parameters["beta"]
 
     def calculate_parameters_speed(self):
-        u = sum(self.speed_list) / float(self.count)
-        sigma = sum((x - u) ** 2 for x in self.speed_list) / float(self.count)
-        return u, sigma
+        parameters = DistributionFitter.fit("normal", self.speed_list)
+        return parameters["mu"], parameters["sigma_square"]
 
     def chi_square_test_iat(self):
-        k = 100
-        pj = 0.01
-        n = 10000
-        beta = 1.3696799000000002
-        # Calculate intervals
-        endpoints = [beta * math.log(1 / (1 - i * pj)) for i in range(k)]
-        endpoints.append(float("inf"))
-        # Calculate Nj
-        N = [sum(1 for x in self.inter_arrival_time_list if endpoints[j] <= x < endpoints[j + 1]) for j in
-             range(k)]
-        for i in range(k):
-            N.append(sum(1 for x in self.inter_arrival_time_list if endpoints[i] <= x < endpoints[i + 1]))
-        chi_square = 0
-        for i in range(k):
-            chi_square += math.pow(N[i] - n * pj, 2) / float(n * pj)
-        return chi_square
+        parameters = DistributionFitter.fit("exponential", self.inter_arrival_time_list)
+        return DistributionFitter.chi_square_test("exponential", parameters, self.inter_arrival_time_list)[0]
+
+    def chi_square_test_base_station(self):
+        parameters = DistributionFitter.fit("uniform", self.base_station_list)
+        return DistributionFitter.chi_square_test("uniform", parameters, self.base_station_list)[0]
 
     def chi_square_test_duration(self):
-        k = 100
-        pj = 0.01
-        n = 10000
-        beta = 109.83589730000018
-        min_duration = min(self.duration_list)
-        self.duration_list = [x - min_duration for x in self.duration_list]
-        # Calculate intervals
-        endpoints = [beta * math.log(1 / (1 - i * pj)) for i in range(k)]
-        endpoints.append(float("inf"))
-        # Calculate Nj
-        N = [sum(1 for x in self.duration_list if endpoints[j] <= x < endpoints[j + 1]) for j in
-             range(k)]
-        for i in range(k):
-            N.append(sum(1 for x in self.duration_list if endpoints[i] <= x < endpoints[i + 1]))
-        chi_square = 0
-        for i in range(k):
-            chi_square += math.pow(N[i] - n * pj, 2) / float(n * pj)
-        return chi_square
-
-    # def chi_square_test_speed(self):
-    #     k = 100
-    #     pj = 0.01
-    #     n = 10000
-    #     mu = 120.07209489999991
-    #     sigma_square = 81.33522998709363
-    #     print("min_duration", min_duration)
-    #     self.duration_list = [x - min_duration for x in self.duration_list]
-    #     # Calculate intervals
-    #     endpoints = [beta * math.log(1 / (1 - i * pj)) for i in range(k)]
-    #     endpoints.append(float("inf"))
-    #     # Calculate Nj
-    #     N = [sum(1 for x in self.duration_list if endpoints[j] <= x < endpoints[j + 1]) for j in
-    #          range(k)]
-    #     for i in range(k):
-    #         N.append(sum(1 for x in self.duration_list if endpoints[i] <= x < endpoints[i + 1]))
-    #     chi_square = 0
-    #     for i in range(k):
-    #         chi_square += math.pow(N[i] - n * pj, 2) / float(n * pj)
-    #     return chi_square
+        parameters = DistributionFitter.fit("shifted_exponential", self.duration_list)
+        return DistributionFitter.chi_square_test("shifted_exponential", parameters, self.duration_list)[0]
+
+    def chi_square_test_speed(self):
+        parameters = DistributionFitter.fit("normal", self.speed_list)
+        return DistributionFitter.chi_square_test("normal", parameters, self.speed_list)[0]
+
+    def fit_parameters(self):
+        """
+        Parameter set for RandomNumberGenerator(parameters=...)
+        """
+        return DistributionFitter.fit_trace(self.inter_arrival_time_list, self.base_station_list,
+                                            self.duration_list, self.speed_list)
 
     @staticmethod
-    def get_input_from_file():
-        ia = InputAnalyzer()
+    def get_input_from_file(path: str = "./data.csv"):
+        ia = InputAnalyzer(path)
         return [
-            ia.inter_arrival_time_list,
-            ia.base_station_list,
-            ia.duration_list,
-            ia.speed_list
+            ia.inter_arrival_time_list.tolist(),
+            ia.base_station_list.tolist(),
+            ia.duration_list.tolist(),
+            ia.speed_list.tolist()
         ]
 
 
@@ -152,11 +99,12 @@ if __name__ == "__main__":
     input_analyzer.draw_histogram_speed()
     input_analyzer.draw_histogram_base_station()
 
-    input_analyzer.chi_square_test_iat()
-
     print("Parameter of inter arrival time: beta = {}".format(input_analyzer.calculate_parameters_iat()))
     print("Chi-square of inter arrival time: {}".format(input_analyzer.chi_square_test_iat()))
     print("Parameter of base station: a = {}, b = {}".format(*input_analyzer.calculate_parameters_base_station()))
-    print("Parameter of duration: beta = {}".format(input_analyzer.calculate_parameters_duration()))
+    print("Chi-square of base station: {}".format(input_analyzer.chi_square_test_base_station()))
+    print("Parameter of duration: shift = {}, beta = {}".format(*input_analyzer.calculate_parameters_duration()))
     print("Chi-square of duration: {}".format(input_analyzer.chi_square_test_duration()))
-    print("Parameter of speed: mu = {}, sigma = {}".format(*input_analyzer.calculate_parameters_speed()))
+    print("Parameter of speed: mu = {}, sigma^2 = {}".format(*input_analyzer.calculate_parameters_speed()))
+    print("Chi-square of speed: {}".format(input_analyzer.chi_square_test_speed()))
+    DistributionFitter.save_parameters(input_analyzer.fit_parameters(), "./parameters.json")
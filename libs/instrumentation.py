@@ -0,0 +1,120 @@
+from libs.event import Event
+import time
+import numpy as np
+
+
+class Instrumentation:
+    """
+    Opt-in probes for a Simulator. attach() shadows the simulator's handle_event and event list push with
+    instrumented versions, so that an uninstrumented simulator runs exactly the original code at no cost.
+    Collected while attached:
+        per event type: number of events and cumulative time spent in handle_event
+        high-water mark of the event list size
+        handover chain lengths: number of handovers each call went through before leaving the system
+            (terminated, left the highway or dropped; blocked calls never enter it)
+        per station: blocked and dropped calls, and exhaustions (events taking the last free channel)
+    Callbacks registered with on() are called as callback(simulator, entry) after every event of their type
+    """
+    EVENT_NAMES = ("initialization", "handover", "termination")
+
+    def __init__(self, timing: bool = True):
+        # Timing costs two clock reads per event; turn it off when only the counts are wanted
+        self.timing = timing
+        self.callbacks = {}
+        self.simulator = None
+        self.event_counts = None
+        self.event_times = None
+        self.max_event_list_size = 0
+        self.chain_length_counts = []
+        self.blocked_per_station = None
+        self.dropped_per_station = None
+        self.exhausted_per_station = None
+        # Handovers already made by the call of each pending event, by sequence number
+        self.chains = {}
+        self.current_chain = 0
+
+    def on(self, event_type: int, callback):
+        self.callbacks.setdefault(event_type, []).append(callback)
+        return self
+
+    def attach(self, simulator):
+        self.simulator = simulator
+        no_event_types = len(simulator.handlers)
+        self.event_counts = np.zeros(no_event_types, dtype=np.int64)
+        self.event_times = np.zeros(no_event_types)
+        self.blocked_per_station = np.zeros(simulator.no_stations + 2, dtype=np.int64)
+        self.dropped_per_station = np.zeros(simulator.no_stations + 2, dtype=np.int64)
+        self.exhausted_per_station = np.zeros(simulator.no_stations + 2, dtype=np.int64)
+        # Pending events scheduled before attaching are taken to be at the start of their chain
+        self.max_event_list_size = len(simulator.event_list)
+        simulator.handle_event = self.handle_event
+        simulator.event_list.push = self.push
+        return self
+
+    def detach(self):
+        del self.simulator.handle_event
+        del self.simulator.event_list.push
+        self.simulator = None
+
+    def push(self, entry: tuple):
+        event_list = self.simulator.event_list
+        type(event_list).push(event_list, entry)
+        if len(event_list) > self.max_event_list_size:
+            self.max_event_list_size = len(event_list)
+        if entry[2] == Event.HANDOVER:
+            self.chains[entry[1]] = self.current_chain + 1
+        elif entry[2] == Event.TERMINATION:
+            self.chains[entry[1]] = self.current_chain
+
+    def handle_event(self, entry: tuple):
+        simulator = self.simulator
+        event_type = entry[2]
+        station = entry[3]
+        self.current_chain = self.chains.pop(entry[1], 0)
+        no_blocked_call = simulator.no_blocked_call
+        no_dropped_call = simulator.no_dropped_call
+        no_free_channel = simulator.no_free_channel[station]
+        if self.timing:
+            start = time.perf_counter()
+            type(simulator).handle_event(simulator, entry)
+            self.event_times[event_type] += time.perf_counter() - start
+        else:
+            type(simulator).handle_event(simulator, entry)
+        self.event_counts[event_type] += 1
+        if simulator.no_blocked_call != no_blocked_call:
+            self.blocked_per_station[station] += 1
+        elif simulator.no_dropped_call != no_dropped_call:
+            self.dropped_per_station[station] += 1
+            self.count_chain(self.current_chain)
+        elif event_type == Event.TERMINATION:
+            self.count_chain(self.current_chain)
+        if no_free_channel > 0 and simulator.no_free_channel[station] == 0:
+            self.exhausted_per_station[station] += 1
+        for callback in self.callbacks.get(event_type, ()):
+            callback(simulator, entry)
+
+    def count_chain(self, length: int):
+        if length >= len(self.chain_length_counts):
+            self.chain_length_counts.extend([0] * (length + 1 - len(self.chain_length_counts)))
+        self.chain_length_counts[length] += 1
+
+    def handover_chain_lengths(self):
+        """
+        Number of calls that went through exactly k handovers, at index k
+        """
+        return np.array(self.chain_length_counts, dtype=np.int64)
+
+    def summary(self):
+        """
+        Plain dict of everything collected, ready for json.dump
+        """
+        names = [self.EVENT_NAMES[i] if i < len(self.EVENT_NAMES) else str(i) for i in range(len(self.event_counts))]
+        return {
+            "event_counts": dict(zip(names, self.event_counts.tolist())),
+            "event_times": dict(zip(names, self.event_times.tolist())),
+            "max_event_list_size": self.max_event_list_size,
+            "handover_chain_lengths": list(self.chain_length_counts),
+            "blocked_per_station": self.blocked_per_station[1:-1].tolist(),
+            "dropped_per_station": self.dropped_per_station[1:-1].tolist(),
+            "exhausted_per_station": self.exhausted_per_station[1:-1].tolist(),
+        }
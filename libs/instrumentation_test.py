@@ -0,0 +1,45 @@
+import unittest
+from libs.event import Event
+from libs.instrumentation import Instrumentation
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+
+
+class TestInstrumentation(unittest.TestCase):
+    def run_with(self, instrumentation: Instrumentation = None):
+        simulator = Simulator(index=0, no_events_total=3000, output_analyzer=None, no_reserved=1, rng=RNG(11),
+                              instrumentation=instrumentation)
+        return simulator, simulator.run()
+
+    def test_results_unchanged(self):
+        instrumentation = Instrumentation()
+        self.assertEqual(self.run_with()[1], self.run_with(instrumentation)[1])
+
+    def test_counts_match_simulator(self):
+        handovers = []
+        instrumentation = Instrumentation(timing=False).on(Event.HANDOVER, lambda simulator, entry: handovers.append(
+            entry[3]))
+        simulator, _ = self.run_with(instrumentation)
+        counts = instrumentation.event_counts
+        self.assertEqual(simulator.no_call_created, counts[Event.INITIALIZATION])
+        self.assertEqual(simulator.no_terminated_call, counts[Event.TERMINATION])
+        self.assertEqual(len(handovers), counts[Event.HANDOVER])
+        self.assertEqual(simulator.no_blocked_call, instrumentation.blocked_per_station.sum())
+        self.assertEqual(simulator.no_dropped_call, instrumentation.dropped_per_station.sum())
+        # Every admitted call leaves once, and a dropped call's last handover is its failed attempt
+        chains = instrumentation.handover_chain_lengths()
+        self.assertEqual(simulator.no_terminated_call + simulator.no_dropped_call, chains.sum())
+        self.assertEqual(counts[Event.HANDOVER], (chains * range(len(chains))).sum())
+        self.assertGreater(instrumentation.max_event_list_size, 0)
+
+    def test_detach_restores_simulator(self):
+        instrumentation = Instrumentation()
+        simulator = Simulator(index=0, no_events_total=100, output_analyzer=None, no_reserved=0, rng=RNG(1),
+                              instrumentation=instrumentation)
+        instrumentation.detach()
+        self.assertNotIn("handle_event", vars(simulator))
+        self.assertNotIn("push", vars(simulator.event_list))
+
+
+if __name__ == '__main__':
+    unittest.main()
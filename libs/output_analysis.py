@@ -1,19 +1,119 @@
-import matplotlib.pyplot as plt
+from libs.streaming_statistics import StreamingStatistics
 import numpy
 
 
 class OutputAnalyzer:
-    def __init__(self, no_event_per_simulation: int, no_iteration: int):
+    def __init__(self, no_event_per_simulation: int, no_iteration: int, record_interval: int = 1):
         self.no_event_total = no_event_per_simulation
         self.no_iteration = no_iteration
-        self.drop_rate_list_2d = [0.0 for _ in range(no_iteration)]
-        self.block_rate_list_2d = [0.0 for _ in range(no_iteration)]
+        # Number of calls between two points of the merged series, coarsened as in StreamingStatistics
+        self.record_interval = StreamingStatistics.interval(no_event_per_simulation, record_interval)
+        # Running mean and sum of squared deviations (Welford) of the replication series, merged one at a time
+        self.no_merged = 0
+        self.drop_rate_mean = None
+        self.block_rate_mean = None
+        self.drop_rate_m2 = None
+        self.block_rate_m2 = None
+        # Same for the per-station measures of StreamingStatistics.station_measures, by name
+        self.no_station_merged = 0
+        self.station_mean = {}
+        self.station_m2 = {}
 
     def update_data(self, iteration_index: int, drop_rate_list: [float], block_rate_list: [float]):
-        self.drop_rate_list_2d[iteration_index] = drop_rate_list
-        self.block_rate_list_2d[iteration_index] = block_rate_list
+        drop_rate_list = numpy.asarray(drop_rate_list, dtype=float)
+        block_rate_list = numpy.asarray(block_rate_list, dtype=float)
+        if self.no_merged == 0:
+            self.drop_rate_mean = numpy.zeros_like(drop_rate_list)
+            self.block_rate_mean = numpy.zeros_like(block_rate_list)
+            self.drop_rate_m2 = numpy.zeros_like(drop_rate_list)
+            self.block_rate_m2 = numpy.zeros_like(block_rate_list)
+        self.no_merged += 1
+        for x, mean, m2 in ((drop_rate_list, self.drop_rate_mean, self.drop_rate_m2),
+                            (block_rate_list, self.block_rate_mean, self.block_rate_m2)):
+            delta = x - mean
+            mean += delta / self.no_merged
+            m2 += delta * (x - mean)
 
-    def plot(self):
+    def update_station_data(self, iteration_index: int, station_statistics: dict):
+        self.no_station_merged += 1
+        for name, x in station_statistics.items():
+            x = numpy.asarray(x, dtype=float)
+            if name not in self.station_mean:
+                self.station_mean[name] = numpy.zeros_like(x)
+                self.station_m2[name] = numpy.zeros_like(x)
+            delta = x - self.station_mean[name]
+            self.station_mean[name] += delta / self.no_station_merged
+            self.station_m2[name] += delta * (x - self.station_mean[name])
+
+    def station_variance(self, name: str):
+        if self.no_station_merged < 2:
+            return numpy.zeros_like(self.station_mean[name])
+        return self.station_m2[name] / (self.no_station_merged - 1)
+
+    def drop_rate_variance(self):
+        return self.drop_rate_m2 / (self.no_merged - 1) if self.no_merged > 1 else numpy.zeros_like(self.drop_rate_m2)
+
+    def block_rate_variance(self):
+        return self.block_rate_m2 / (self.no_merged - 1) if self.no_merged > 1 else numpy.zeros_like(
+            self.block_rate_m2)
+
+    def interval_rates(self, rate_series):
+        """
+        Rates (in %) of the calls created within each record interval, from a cumulative rate series.
+        The cumulative rates are averages over a growing number of calls, which smears the initial transient out
+        over the whole run; the detectors below run on the per-interval rates instead
+        """
+        counts = numpy.asarray(rate_series, dtype=float) * numpy.arange(len(rate_series))
+        return numpy.diff(counts)
+
+    def welch_warm_up(self, window: int = None):
+        """
+        Welch's method: number of warm-up calls after which the moving average of the mean per-interval rates has
+        reached its steady-state level, taken as the larger of drop and block
+        """
+        return max(welch_truncation(self.interval_rates(series), window)
+                   for series in (self.drop_rate_mean, self.block_rate_mean)) * self.record_interval
+
+    def mser_warm_up(self, batch_size: int = 5):
+        """
+        MSER-5: number of warm-up calls minimizing the marginal standard error of the remaining mean per-interval
+        rates, taken as the larger of drop and block. On noisy series it keeps a short transient whose bias costs
+        less than the calls deleting it would; on this model's output it deletes nothing and returns 0
+        """
+        return max(mser_truncation(self.interval_rates(series), batch_size)
+                   for series in (self.drop_rate_mean, self.block_rate_mean)) * self.record_interval
+
+    def warm_up(self, method: str = "welch"):
+        if method == "mser":
+            return self.mser_warm_up()
+        elif method == "welch":
+            return self.welch_warm_up()
+        raise Exception("Unknown warm-up method")
+
+    def bands(self, confidence: float = 0.95):
+        """
+        Mean drop and block rate series with their pointwise confidence bands, as {name: (mean, lower, upper)}
+        """
+        bands = {}
+        for name, mean, variance in (("drop_rate", self.drop_rate_mean, self.drop_rate_variance()),
+                                     ("block_rate", self.block_rate_mean, self.block_rate_variance())):
+            if self.no_merged < 2:
+                bands[name] = (mean, mean, mean)
+                continue
+            from scipy import stats
+            half_width = stats.t.ppf((1 + confidence) / 2., self.no_merged - 1) * numpy.sqrt(
+                variance / self.no_merged)
+            bands[name] = (mean, mean - half_width, mean + half_width)
+        return bands
+
+    def render(self, path: str, max_points: int = 2000, confidence: float = 0.95):
+        """
+        Headless counterpart of plot: save the downsampled mean curves and confidence bands to path (.png, .svg)
+        """
+        render_bands(path, self.bands(confidence), "Mean Summary Measures Of {} Simulations".format(self.no_merged),
+                     self.record_interval, max_points)
+
+    def plot(self, max_points: int = 2000):
         # dropped_rate_list = []
         # blocked_rate_list = []
         # for i in range(self.no_event_total):
@@ -24,15 +124,128 @@ class OutputAnalyzer:
         #     blocked_rate_list.append(
         #         sum(self.block_rate_list_2d[iteration_index][j] for iteration_index in
         #             range(self.no_iteration)) / float(self.no_iteration))
-        dropped_rate_list = numpy.mean(self.drop_rate_list_2d, axis=0)
-        blocked_rate_list = numpy.mean(self.block_rate_list_2d, axis=0)
+        # Plotting libraries are only loaded by the runs that plot
+        import matplotlib.pyplot as plt
+        dropped_rate_list = self.drop_rate_mean
+        blocked_rate_list = self.block_rate_mean
+        x = numpy.arange(len(dropped_rate_list)) * self.record_interval
+        dropped_kept = lttb(x, dropped_rate_list, max_points)
+        blocked_kept = lttb(x, blocked_rate_list, max_points)
 
         # [x / float(self.no_event_total) * 100 for x in self.no_dropped_call_list]
         # blocked_rate_list = [x / float(self.no_event_total) * 100 for x in self.no_blocked_call_list]
-        plt.plot(dropped_rate_list, label="Percentage of dropped calls",
+        plt.plot(x[dropped_kept], dropped_rate_list[dropped_kept], label="Percentage of dropped calls",
                  color="green")
-        plt.plot(blocked_rate_list, label="Percentage of blocked calls",
+        plt.plot(x[blocked_kept], blocked_rate_list[blocked_kept], label="Percentage of blocked calls",
                  color="red")
         plt.title("Mean Summary Measures Of {} Simulations".format(self.no_iteration))
         plt.legend()
         plt.show()
+
+
+def confidence_interval(data, confidence=0.95):
+    from scipy import stats
+    a = 1.0 * numpy.array(data)
+    n = len(a)
+    if n < 2:
+        # No spread to estimate from a single value
+        return numpy.nan, numpy.nan
+    m, se = numpy.mean(a), stats.sem(a)
+    h = se * stats.t.ppf((1 + confidence) / 2., n - 1)
+    return m - h, m + h
+
+
+def moving_average(data, window: int):
+    """
+    Welch's moving average: point i averages the 2 * window + 1 points around it, or the 2 * i + 1 points
+    [0 ... 2 * i] near the start; points closer than window to the end are left out
+    """
+    a = numpy.asarray(data, dtype=float)
+    m = len(a) - window
+    if m <= 0:
+        return numpy.zeros(0)
+    cumulative = numpy.concatenate(([0.], numpy.cumsum(a)))
+    i = numpy.arange(m)
+    half_width = numpy.minimum(i, window)
+    return (cumulative[i + half_width + 1] - cumulative[i - half_width]) / (2 * half_width + 1)
+
+
+def welch_truncation(data, window: int = None):
+    """
+    Index of the first point where the moving average reaches the level of its second half, searched within the
+    first half. The window must be short compared to the transient, so it does not grow with the run length
+    """
+    if window is None:
+        window = max(1, min(len(data) // 10, 100))
+    average = moving_average(data, window)
+    if len(average) < 2:
+        return 0
+    half = len(average) // 2
+    level = numpy.mean(average[half:])
+    crossed = numpy.flatnonzero(numpy.sign(average[:half] - level) != numpy.sign(average[0] - level))
+    return int(crossed[0]) if len(crossed) > 0 else half
+
+
+def mser_truncation(data, batch_size: int = 5):
+    """
+    MSER: index of the first point kept when deleting d whole batches of batch_size points minimizes the
+    squared standard error sum((Z_j - mean) ^ 2) / (k - d) ^ 2 of the remaining k - d batch means Z_j, for d
+    up to k / 2. All candidates are evaluated at once from suffix sums
+    """
+    k = len(data) // batch_size
+    if k < 2:
+        return 0
+    z = numpy.asarray(data[:k * batch_size], dtype=float).reshape(k, batch_size).mean(axis=1)
+    suffix_sum = numpy.cumsum(z[::-1])[::-1]
+    suffix_sum_square = numpy.cumsum((z * z)[::-1])[::-1]
+    m = numpy.arange(k, 0, -1, dtype=float)
+    mser = (suffix_sum_square - suffix_sum ** 2 / m) / m ** 2
+    return int(numpy.argmin(mser[:k // 2 + 1])) * batch_size
+
+
+def lttb(x, y, no_points: int):
+    """
+    Largest-Triangle-Three-Buckets: indices of no_points points of (x, y) that keep its visual shape. The first
+    and last points are kept; every bucket in between contributes the point forming the largest triangle with the
+    point kept before it and the mean of the next bucket
+    """
+    n = len(x)
+    if no_points >= n or no_points < 3:
+        return numpy.arange(n)
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    edges = numpy.linspace(1, n - 1, no_points - 1).astype(numpy.int64)
+    indices = numpy.zeros(no_points, dtype=numpy.int64)
+    indices[-1] = n - 1
+    for i in range(no_points - 2):
+        start, stop = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x, next_y = x[stop:edges[i + 2]].mean(), y[stop:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[n - 1], y[n - 1]
+        a = indices[i]
+        area = numpy.abs((x[a] - next_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (next_y - y[a]))
+        indices[i + 1] = start + int(numpy.argmax(area))
+    return indices
+
+
+def render_bands(path: str, bands: dict, title: str, record_interval: int = 1, max_points: int = 2000):
+    """
+    Draw each (mean, lower, upper) of bands, downsampled with LTTB on the mean, and save the figure to path
+    without a display (the format follows the extension)
+    """
+    # A bare Figure renders through the Agg canvas and leaves the pyplot backend and state alone
+    from matplotlib.figure import Figure
+    colors = {"drop_rate": "green", "block_rate": "red"}
+    labels = {"drop_rate": "Percentage of dropped calls", "block_rate": "Percentage of blocked calls"}
+    figure = Figure()
+    axes = figure.subplots()
+    for name, (mean, lower, upper) in bands.items():
+        x = numpy.arange(len(mean)) * record_interval
+        kept = lttb(x, mean, max_points)
+        axes.fill_between(x[kept], lower[kept], upper[kept], color=colors.get(name), alpha=0.2, linewidth=0)
+        axes.plot(x[kept], mean[kept], label=labels.get(name, name), color=colors.get(name))
+    axes.set_title(title)
+    axes.set_xlabel("Calls")
+    axes.legend()
+    figure.savefig(path)
@@ -0,0 +1,34 @@
+import unittest
+import numpy as np
+from libs.output_analysis import OutputAnalyzer, mser_truncation, welch_truncation
+
+
+class TestWarmUpDetection(unittest.TestCase):
+    def transient(self):
+        # Rates ramping up to a noisy steady state of 1% over the first 300 points
+        generator = np.random.default_rng(3)
+        data = 1 + generator.normal(0, 0.2, 5000)
+        data[:300] *= np.linspace(0, 1, 300)
+        return data
+
+    def test_welch_finds_end_of_transient(self):
+        self.assertTrue(200 <= welch_truncation(self.transient()) <= 500)
+
+    def test_mser_finds_end_of_transient(self):
+        self.assertTrue(200 <= mser_truncation(self.transient()) <= 500)
+
+    def test_stationary_series_needs_no_warm_up(self):
+        data = np.random.default_rng(5).normal(1, 0.2, 5000)
+        self.assertLess(mser_truncation(data), 250)
+
+    def test_warm_up_in_calls(self):
+        output_analyzer = OutputAnalyzer(50000, no_iteration=1, record_interval=10)
+        # Cumulative rates of the transient, one point every 10 calls
+        rates = np.concatenate(([0.], self.transient()))
+        output_analyzer.update_data(0, np.cumsum(rates) / np.maximum(np.arange(len(rates)), 1), np.zeros(5001))
+        self.assertTrue(np.allclose(output_analyzer.interval_rates(output_analyzer.drop_rate_mean), rates[1:]))
+        self.assertEqual(output_analyzer.mser_warm_up(), mser_truncation(rates[1:]) * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,300 @@
+from bisect import bisect_right
+from libs.arrival_stream import CachedArrivalStream, StochasticArrivalStream, TraceArrivalStream
+from libs.event import Event
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator, check_topology
+import heapq
+import itertools
+import multiprocessing
+import numpy as np
+
+# Margin that keeps the crossing-time bounds below the exact floating point event times
+SAFETY = 1 - 1e-9
+
+
+class SegmentSimulator(Simulator):
+    """
+    Simulator of the contiguous stations [first_station ... last_station] of a longer highway.
+    A call leaving the segment is not handed over locally: its channel is freed by a RELEASE event at the
+    handover time and the handover is posted to the neighbouring segment as a timestamped message.
+    Every pending event also contributes a lower bound on the time at which it can cause such a message, which is
+    what the conservative synchronization of ParallelHighwaySimulator advances on
+    """
+    RELEASE = 3
+
+    def __init__(self, first_station: int, last_station: int, arrivals: np.ndarray, times: np.ndarray,
+                 indices: np.ndarray, warm_up_time: float, no_reserved: int, no_stations: int, no_channels: int,
+                 cell_length: float, scheduler: str = "heap"):
+        super().__init__(index=0, no_events_total=0, output_analyzer=None, no_reserved=no_reserved,
+                         scheduler=scheduler, arrival_stream=CachedArrivalStream(arrivals[:0]),
+                         no_channels=no_channels, no_stations=no_stations, cell_length=cell_length)
+        self.first_station = first_station
+        self.last_station = last_station
+        self.handlers = self.handlers + (self.handle_release,)
+        # Warm-up is cut by time here: the calls of the warm-up are exactly those arriving before warm_up_time
+        self.warm_up_events = -1
+        self.warm_up_time = warm_up_time
+        self.warmed_up = False
+        self.no_dropped_call_at_warm_up = 0
+        self.no_blocked_call_at_warm_up = 0
+        # Handovers posted to other segments since the last exchange
+        self.outbox = []
+        # Lower bounds (bound, time) on the time of the next message caused by each pending event
+        self.bounds = []
+        # Arrivals keep their global call index as sequence number; other events are numbered after them
+        self.sequence = itertools.count(int(indices[-1]) + 1 if len(indices) > 0 else 0)
+        for arrival, time, index in zip(arrivals.tolist(), times.tolist(), indices.tolist()):
+            _, station, duration, direction, speed, position = arrival
+            self.event_list.push((time, index, Event.INITIALIZATION, station, duration, direction, speed, position))
+            if direction == Event.LEFT:
+                time_to_handover = position / speed * 3600
+            else:
+                time_to_handover = (cell_length - position) / speed * 3600
+            self.push_bound(time, station, duration, direction, speed, time_to_handover)
+
+    def push_bound(self, time: float, station: int, duration: float, direction: int, speed: float,
+                   time_to_handover: float):
+        """
+        Bound for a call that holds station at time and hands over to the next one after time_to_handover
+        """
+        if direction == Event.LEFT:
+            exit_station = self.first_station - 1
+            hops = station - exit_station
+        else:
+            exit_station = self.last_station + 1
+            hops = exit_station - station
+        if exit_station < 1 or exit_station > self.no_stations:
+            return
+        delay = time_to_handover + (hops - 1) * self.cell_length / speed * 3600
+        if duration < delay * SAFETY:
+            # The call surely ends before leaving the segment
+            return
+        heapq.heappush(self.bounds, (time + delay * SAFETY, time))
+
+    def deliver(self, messages: [tuple]):
+        """
+        Insert handovers posted by the neighbours and return the earliest time a message may leave this segment
+        """
+        for time, station, duration, direction, speed in messages:
+            self.event_list.push((time, next(self.sequence), Event.HANDOVER, station, duration, direction, speed, 0))
+            self.push_bound(time, station, duration, direction, speed, self.cell_length / speed * 3600)
+        return self.earliest_output_time()
+
+    def earliest_output_time(self):
+        return self.bounds[0][0] if self.bounds else float("inf")
+
+    def advance_to(self, time_limit: float):
+        """
+        Process every event before time_limit and return the handovers posted to other segments
+        """
+        event_list = self.event_list
+        while len(event_list) > 0 and event_list.peek()[0] < time_limit:
+            entry = event_list.pop()
+            if not self.warmed_up and entry[0] >= self.warm_up_time:
+                self.mark_warm_up()
+            self.handle_event(entry)
+        # Every event before time_limit is processed, so bounds of events before it are stale
+        while self.bounds and self.bounds[0][1] < time_limit:
+            heapq.heappop(self.bounds)
+        outbox = self.outbox
+        self.outbox = []
+        return outbox
+
+    def mark_warm_up(self):
+        self.warmed_up = True
+        self.no_dropped_call_at_warm_up = self.no_dropped_call
+        self.no_blocked_call_at_warm_up = self.no_blocked_call
+
+    def counters(self):
+        if not self.warmed_up:
+            self.mark_warm_up()
+        return (self.no_call_created, self.no_dropped_call, self.no_blocked_call, self.no_terminated_call,
+                self.no_dropped_call_at_warm_up, self.no_blocked_call_at_warm_up)
+
+    def handle_event(self, entry: tuple):
+        arrival_time, _, event_type, station, duration, direction, speed, position = entry
+        self.handlers[event_type](arrival_time, speed, station, position, duration, direction)
+
+    def handle_release(self, time: float, speed: float, station: int, position: float, duration: float,
+                       direction: int):
+        self.clock = time
+        self.release(time, station)
+
+    def schedule_next(self, station: int, next_station: int, duration: float, time_to_handover: float,
+                      direction: int, speed: float):
+        if duration <= time_to_handover or next_station == 0 or next_station > self.no_stations:
+            super().schedule_next(station, next_station, duration, time_to_handover, direction, speed)
+        elif next_station < self.first_station or next_station > self.last_station:
+            # Handover to another segment
+            time = self.clock + time_to_handover
+            self.event_list.push((time, next(self.sequence), self.RELEASE, station, 0, direction, speed, 0))
+            self.outbox.append((time, next_station, duration - time_to_handover, direction, speed))
+        else:
+            super().schedule_next(station, next_station, duration, time_to_handover, direction, speed)
+            self.push_bound(self.clock + time_to_handover, next_station, duration - time_to_handover, direction,
+                            speed, self.cell_length / speed * 3600)
+
+
+def dispatch(segment: SegmentSimulator, command: str, argument):
+    if command == "deliver":
+        return segment.deliver(argument)
+    elif command == "advance":
+        return segment.advance_to(argument)
+    elif command == "counters":
+        return segment.counters()
+    raise Exception("Unknown command")
+
+
+def segment_worker(connection, kwargs: dict):
+    """
+    Serve one segment in a worker process until it is asked for its counters
+    """
+    segment = SegmentSimulator(**kwargs)
+    while True:
+        command, argument = connection.recv()
+        connection.send(dispatch(segment, command, argument))
+        if command == "counters":
+            connection.close()
+            return
+
+
+class LocalSegment:
+    """
+    Segment served in the coordinating process
+    """
+
+    def __init__(self, kwargs: dict):
+        self.segment = SegmentSimulator(**kwargs)
+        self.result = None
+
+    def send(self, command: str, argument=None):
+        self.result = dispatch(self.segment, command, argument)
+
+    def receive(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class RemoteSegment:
+    """
+    Segment served by a worker process; send() returns immediately so that all segments work concurrently
+    """
+
+    def __init__(self, kwargs: dict):
+        self.connection, child_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=segment_worker, args=(child_connection, kwargs))
+        self.process.start()
+
+    def send(self, command: str, argument=None):
+        self.connection.send((command, argument))
+
+    def receive(self):
+        return self.connection.recv()
+
+    def close(self):
+        self.process.join()
+
+
+class ParallelHighwaySimulator:
+    """
+    Splits the highway into no_segments contiguous groups of stations, each simulated by its own worker process.
+    Synchronization is conservative and window based: every segment reports a lower bound on the time of the next
+    handover it can post (from the speed, position and remaining duration of its pending calls), all segments
+    safely process every event before the smallest bound, then exchange the handovers posted meanwhile.
+    The input stream is the one Simulator draws for the same generator, so the counts match the sequential engine
+    """
+
+    def __init__(self, no_events_total: int, no_reserved: int, no_segments: int,
+                 warm_up_events: int = 0,
+                 stochastic: bool = True,
+                 rng: RNG = None,
+                 trace_path: str = "./data.csv",
+                 no_stations: int = 20,
+                 no_channels: int = 10,
+                 cell_length: float = 2.0,
+                 scheduler: str = "heap",
+                 processes: bool = True):
+        self.no_events_total = no_events_total
+        self.no_reserved = no_reserved
+        self.no_segments = no_segments
+        self.warm_up_events = warm_up_events
+        self.stochastic = stochastic
+        if rng is None:
+            rng = RNG(parameters={"BASE_STATION_MAX": no_stations, "CELL_LENGTH": cell_length})
+        check_topology(rng, no_stations, cell_length, stochastic, trace_path, no_events_total)
+        self.rng = rng
+        self.trace_path = trace_path
+        self.no_stations = no_stations
+        self.no_channels = no_channels
+        self.cell_length = cell_length
+        self.scheduler = scheduler
+        # Run the segments in worker processes, or in this process (same results, handy for debugging)
+        self.processes = processes
+        self.no_call_created = 0
+        self.no_dropped_call = 0
+        self.no_blocked_call = 0
+        self.no_terminated_call = 0
+        self.no_windows = 0
+
+    def partition(self):
+        """
+        Station ranges [first, last] of the segments, as even as possible
+        """
+        bounds = np.linspace(0, self.no_stations, self.no_segments + 1).round().astype(int)
+        return [(int(bounds[i]) + 1, int(bounds[i + 1])) for i in range(self.no_segments)]
+
+    def create_segments(self):
+        if self.stochastic:
+            stream = StochasticArrivalStream(self.rng, no_calls=self.no_events_total)
+        else:
+            stream = TraceArrivalStream(self.rng, path=self.trace_path, no_calls=self.no_events_total)
+        arrivals = CachedArrivalStream.record(stream)
+        # Accumulate in call order, exactly as the sequential engine chains arrival times
+        times = np.array(list(itertools.accumulate(arrivals["inter_arrival_time"].tolist())))
+        warm_up_time = times[self.warm_up_events] if self.warm_up_events < len(times) else float("inf")
+        segments = []
+        for first_station, last_station in self.partition():
+            indices = np.flatnonzero((arrivals["station"] >= first_station) & (arrivals["station"] <= last_station))
+            kwargs = dict(first_station=first_station, last_station=last_station, arrivals=arrivals[indices],
+                          times=times[indices], indices=indices, warm_up_time=warm_up_time,
+                          no_reserved=self.no_reserved, no_stations=self.no_stations, no_channels=self.no_channels,
+                          cell_length=self.cell_length, scheduler=self.scheduler)
+            segments.append(RemoteSegment(kwargs) if self.processes else LocalSegment(kwargs))
+        return segments
+
+    def run(self):
+        segments = self.create_segments()
+        first_stations = [first for first, _ in self.partition()]
+        inboxes = [[] for _ in segments]
+        while True:
+            time_limit = min(self.broadcast(segments, "deliver", inboxes))
+            inboxes = [[] for _ in segments]
+            for outbox in self.broadcast(segments, "advance", [time_limit for _ in segments]):
+                for message in outbox:
+                    inboxes[bisect_right(first_stations, message[1]) - 1].append(message)
+            self.no_windows += 1
+            if time_limit == float("inf"):
+                break
+        dropped_at_warm_up = blocked_at_warm_up = 0
+        for counters in self.broadcast(segments, "counters", [None for _ in segments]):
+            created, dropped, blocked, terminated, dropped_before, blocked_before = counters
+            self.no_call_created += created
+            self.no_dropped_call += dropped
+            self.no_blocked_call += blocked
+            self.no_terminated_call += terminated
+            dropped_at_warm_up += dropped_before
+            blocked_at_warm_up += blocked_before
+        for segment in segments:
+            segment.close()
+        no_counted_call = float(self.no_call_created - self.warm_up_events)
+        drop_rate = (self.no_dropped_call - dropped_at_warm_up) / no_counted_call * 100
+        block_rate = (self.no_blocked_call - blocked_at_warm_up) / no_counted_call * 100
+        return drop_rate, block_rate
+
+    @classmethod
+    def broadcast(cls, segments: list, command: str, arguments: list):
+        for segment, argument in zip(segments, arguments):
+            segment.send(command, argument)
+        return [segment.receive() for segment in segments]
@@ -0,0 +1,22 @@
+import unittest
+from libs.parallel_highway import ParallelHighwaySimulator
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+
+
+class TestParallelHighwaySimulator(unittest.TestCase):
+    def test_matches_sequential_engine(self):
+        parameters = {"BASE_STATION_MAX": 40, "INTER_ARRIVAL_TIME_BETA": 0.7}
+        simulator = Simulator(index=0, no_events_total=5000, output_analyzer=None, no_reserved=1,
+                              warm_up_events=200, rng=RNG(11, parameters), no_stations=40)
+        expected = simulator.run()
+        for processes in (False, True):
+            parallel = ParallelHighwaySimulator(no_events_total=5000, no_reserved=1, no_segments=3,
+                                                warm_up_events=200, rng=RNG(11, parameters), no_stations=40,
+                                                processes=processes)
+            self.assertEqual(expected, parallel.run())
+            self.assertEqual(simulator.no_terminated_call, parallel.no_terminated_call)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,45 +1,132 @@
-import random
 import math
+import numpy as np
 
 
 class RandomNumberGenerator:
+    # Direction codes returned by generate_directions
+    LEFT = 0
+    RIGHT = 1
+    DIRECTIONS = ("LEFT", "RIGHT")
+    # Parameters fitted from data.csv by hand; DistributionFitter.fit_trace produces a loadable set
+    INTER_ARRIVAL_TIME_BETA = 1.3696799000000002
+    BASE_STATION_MIN = 1
+    BASE_STATION_MAX = 20
+    DURATION_BETA = 109.83589730000018  # Unshifted mean; the shifted-exponential MLE for this shift is 99.83
+    DURATION_SHIFT = 10.004
+    SPEED_MU = 120.07209489999991
+    SPEED_SIGMA_SQUARE = 81.33522998709363
+    # Length of a cell in km; positions are uniform over the cell
+    CELL_LENGTH = 2.0
+
+    PARAMETERS = ("INTER_ARRIVAL_TIME_BETA", "BASE_STATION_MIN", "BASE_STATION_MAX", "DURATION_BETA",
+                  "DURATION_SHIFT", "SPEED_MU", "SPEED_SIGMA_SQUARE", "CELL_LENGTH")
+
+    def __init__(self, seed=None, parameters: dict = None, inversion: bool = False, antithetic: bool = False):
+        # seed may be an int, a numpy SeedSequence (e.g. one spawned per replication) or None for fresh entropy
+        self.generator = np.random.default_rng(seed)
+        # With inversion, every batch variant maps one uniform per value through the inverse cdf, so that two
+        # generators with the same seed stay aligned draw for draw; antithetic (which implies inversion) uses 1 - u
+        # instead of u, giving the negatively correlated partner of the non-antithetic stream
+        self.inversion = inversion or antithetic
+        self.antithetic = antithetic
+        # Override the class defaults with a fitted parameter set, see DistributionFitter.fit_trace
+        for name, value in (parameters or {}).items():
+            if name not in self.PARAMETERS:
+                raise Exception("Unknown parameter")
+            setattr(self, name, value)
+
+    @classmethod
+    def antithetic_pair(cls, seed, parameters: dict = None):
+        """
+        Two generators sharing seed, driven by complementary uniforms
+        """
+        return cls(seed, parameters, inversion=True), cls(seed, parameters, antithetic=True)
+
+    def input_means(self):
+        """
+        Means of the inter-arrival time, duration and speed distributions, in that order
+        """
+        return np.array([self.INTER_ARRIVAL_TIME_BETA, self.DURATION_SHIFT + self.DURATION_BETA, self.SPEED_MU])
+
     @classmethod
-    def generate_direction(cls):
-        x = random.randint(0, 1)
-        if x == 0:
+    def spawn_seeds(cls, seed, n: int):
+        """
+        Derive n statistically independent child seeds from one root seed
+        """
+        return np.random.SeedSequence(seed).spawn(n)
+
+    def generate_direction(self):
+        x = self.generator.integers(self.LEFT, self.RIGHT, endpoint=True)
+        if x == self.LEFT:
             return "LEFT"
         else:
             return "RIGHT"
 
-    @classmethod
-    def generate_position(cls):
-        return random.uniform(0, 2)
+    def generate_position(self):
+        return self.generator.uniform(0, self.CELL_LENGTH)
 
-    @classmethod
-    def generate_inter_arrival_time(cls):
-        return random.expovariate(1 / 1.3696799000000002)
+    def generate_inter_arrival_time(self):
+        return self.generator.exponential(self.INTER_ARRIVAL_TIME_BETA)
 
-    @classmethod
-    def generate_base_station(cls):
-        return random.randint(1, 20)
+    def generate_base_station(self):
+        return int(self.generator.integers(self.BASE_STATION_MIN, self.BASE_STATION_MAX, endpoint=True))
 
-    @classmethod
-    def generate_duration(cls):
-        return random.expovariate(1 / 109.83589730000018) + 10.004  # TODO: verify the shift
+    def generate_duration(self):
+        return self.generator.exponential(self.DURATION_BETA) + self.DURATION_SHIFT
 
-    @classmethod
-    def generate_speed(cls):
-        return random.normalvariate(120.07209489999991, math.sqrt(81.33522998709363))
+    def generate_speed(self):
+        return self.generator.normal(self.SPEED_MU, math.sqrt(self.SPEED_SIGMA_SQUARE))
+
+    # Batch variants; each returns a numpy array of the given size drawn from the same generator
+
+    def generate_uniforms(self, size: int):
+        # Keep u and 1 - u away from 0 and 1, where the inverse cdfs are infinite
+        u = np.clip(self.generator.random(size), 2 ** -53, 1 - 2 ** -53)
+        return 1 - u if self.antithetic else u
+
+    def generate_directions(self, size: int):
+        if self.inversion:
+            return (self.generate_uniforms(size) * 2).astype(np.int8)
+        return self.generator.integers(self.LEFT, self.RIGHT, size=size, endpoint=True, dtype=np.int8)
+
+    def generate_positions(self, size: int):
+        if self.inversion:
+            return self.generate_uniforms(size) * self.CELL_LENGTH
+        return self.generator.uniform(0, self.CELL_LENGTH, size=size)
+
+    def generate_inter_arrival_times(self, size: int):
+        if self.inversion:
+            return -self.INTER_ARRIVAL_TIME_BETA * np.log1p(-self.generate_uniforms(size))
+        return self.generator.exponential(self.INTER_ARRIVAL_TIME_BETA, size=size)
+
+    def generate_base_stations(self, size: int):
+        if self.inversion:
+            no_values = self.BASE_STATION_MAX - self.BASE_STATION_MIN + 1
+            return (self.BASE_STATION_MIN + self.generate_uniforms(size) * no_values).astype(np.int16)
+        return self.generator.integers(self.BASE_STATION_MIN, self.BASE_STATION_MAX, size=size, endpoint=True,
+                                       dtype=np.int16)
+
+    def generate_durations(self, size: int):
+        if self.inversion:
+            return self.DURATION_SHIFT - self.DURATION_BETA * np.log1p(-self.generate_uniforms(size))
+        return self.generator.exponential(self.DURATION_BETA, size=size) + self.DURATION_SHIFT
+
+    def generate_speeds(self, size: int):
+        if self.inversion:
+            from scipy.special import ndtri
+            return self.SPEED_MU + math.sqrt(self.SPEED_SIGMA_SQUARE) * ndtri(self.generate_uniforms(size))
+        return self.generator.normal(self.SPEED_MU, math.sqrt(self.SPEED_SIGMA_SQUARE), size=size)
 
 
 if __name__ == "__main__":
     iteration = 100
-    direction_list = [RandomNumberGenerator.generate_direction() for i in range(iteration)]
-    position_list = [RandomNumberGenerator.generate_position() for i in range(iteration)]
-    inter_arrival_time_list = [RandomNumberGenerator.generate_inter_arrival_time() for i in range(iteration)]
-    base_station_list = [RandomNumberGenerator.generate_base_station() for i in range(iteration)]
-    duration_list = [RandomNumberGenerator.generate_duration() for i in range(iteration)]
-    speed_list = [RandomNumberGenerator.generate_speed() for i in range(iteration)]
+    rng = RandomNumberGenerator()
+    direction_list = [RandomNumberGenerator.DIRECTIONS[x] for x in rng.generate_directions(iteration)]
+    position_list = rng.generate_positions(iteration)
+    inter_arrival_time_list = rng.generate_inter_arrival_times(iteration)
+    base_station_list = rng.generate_base_stations(iteration)
+    duration_list = rng.generate_durations(iteration)
+    speed_list = rng.generate_speeds(iteration)
     print("direction", direction_list)
     print("position", position_list)
     print("inter_arrival_time", inter_arrival_time_list)
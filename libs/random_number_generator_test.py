@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+from libs.random_number_generator import RandomNumberGenerator as RNG
+
+
+class TestRandomNumberGenerator(unittest.TestCase):
+    SIZE = 200000
+
+    def test_batch_dtypes_and_ranges(self):
+        for inversion in (False, True):
+            rng = RNG(1, inversion=inversion)
+            directions = rng.generate_directions(self.SIZE)
+            self.assertEqual(np.int8, directions.dtype)
+            self.assertEqual({RNG.LEFT, RNG.RIGHT}, set(np.unique(directions).tolist()))
+            stations = rng.generate_base_stations(self.SIZE)
+            self.assertEqual(np.int16, stations.dtype)
+            self.assertEqual(RNG.BASE_STATION_MIN, stations.min())
+            self.assertEqual(RNG.BASE_STATION_MAX, stations.max())
+            positions = rng.generate_positions(self.SIZE)
+            self.assertTrue(np.all((positions >= 0) & (positions <= RNG.CELL_LENGTH)))
+            self.assertTrue(np.all(rng.generate_inter_arrival_times(self.SIZE) > 0))
+            self.assertTrue(np.all(rng.generate_durations(self.SIZE) >= RNG.DURATION_SHIFT))
+
+    def test_batch_means_match_parameters(self):
+        for inversion in (False, True):
+            rng = RNG(2, inversion=inversion)
+            means = [rng.generate_inter_arrival_times(self.SIZE).mean(), rng.generate_durations(self.SIZE).mean(),
+                     rng.generate_speeds(self.SIZE).mean()]
+            self.assertTrue(np.allclose(rng.input_means(), means, rtol=0.01))
+            self.assertAlmostEqual(0.5, rng.generate_directions(self.SIZE).mean(), delta=0.01)
+            self.assertAlmostEqual(RNG.CELL_LENGTH / 2, rng.generate_positions(self.SIZE).mean(), delta=0.01)
+            self.assertAlmostEqual((RNG.BASE_STATION_MIN + RNG.BASE_STATION_MAX) / 2.,
+                                   rng.generate_base_stations(self.SIZE).mean(), delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,294 @@
+from concurrent.futures import ProcessPoolExecutor
+from libs.arrival_stream import StochasticArrivalStream
+from libs.batch_simulator import BatchSimulator
+from libs.checkpoint import Checkpoint
+from libs.empirical import EmpiricalRandomNumberGenerator as EmpiricalRNG
+from libs.output_analysis import OutputAnalyzer
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.series_store import SeriesStore
+from libs.simulator import Simulator
+from libs.streaming_statistics import StreamingStatistics
+from libs.trace_store import TraceStore
+from libs.variance_reduction import VarianceReduction
+import collections
+import inspect
+import itertools
+import os
+
+
+def run_replication(index: int, no_events_total: int, no_reserved: int, warm_up_events: int, stochastic: bool,
+                    seed, scheduler: str = "heap", record_interval: int = 1, trace_path: str = "./data.csv",
+                    parameters: dict = None, inversion: bool = False, antithetic: bool = False,
+                    empirical: bool = False, no_channels: int = 10, no_stations: int = 20, cell_length: float = 2.0):
+    """
+    Run a single replication; module level so that it can be shipped to worker processes
+    """
+    rng = replication_rng(seed, trace_path, parameters, inversion, antithetic, empirical)
+    simulator = Simulator(index=index, no_events_total=no_events_total, output_analyzer=None,
+                          no_reserved=no_reserved, warm_up_events=warm_up_events, stochastic=stochastic, rng=rng,
+                          scheduler=scheduler, record_interval=record_interval, trace_path=trace_path,
+                          no_channels=no_channels, no_stations=no_stations, cell_length=cell_length)
+    return replication_result(simulator)
+
+
+# Arguments of run_replication, in the order of its parameters, so that they can be passed positionally to it and
+# read by name elsewhere
+ReplicationArguments = collections.namedtuple("ReplicationArguments", inspect.signature(run_replication).parameters)
+
+
+def run_batch(args: [ReplicationArguments]):
+    """
+    Run the replications given by run_replication arguments, which differ only in index, seed and antithetic flag,
+    together on one BatchSimulator; module level so that it can be shipped to worker processes
+    """
+    first = args[0]
+    rngs = [replication_rng(arg.seed, first.trace_path, first.parameters, first.inversion, arg.antithetic,
+                            first.empirical) for arg in args]
+    simulator = BatchSimulator([arg.index for arg in args], no_events_total=first.no_events_total,
+                               output_analyzer=None, no_reserved=first.no_reserved,
+                               warm_up_events=first.warm_up_events, stochastic=first.stochastic, rngs=rngs,
+                               record_interval=first.record_interval, trace_path=first.trace_path,
+                               no_channels=first.no_channels, no_stations=first.no_stations,
+                               cell_length=first.cell_length)
+    drop_rate_list, block_rate_list = simulator.run()
+    station_statistics = simulator.station_statistics()
+    results = []
+    for r, stream in enumerate(simulator.arrival_streams):
+        input_means = stream.input_means() if isinstance(stream, StochasticArrivalStream) else None
+        results.append((drop_rate_list[r], block_rate_list[r], simulator.drop_rate_series[r],
+                        simulator.block_rate_series[r], station_statistics[r], input_means))
+    return results
+
+
+def replication_rng(seed, trace_path: str, parameters: dict, inversion: bool, antithetic: bool, empirical: bool):
+    if empirical:
+        rng = EmpiricalRNG.from_trace(trace_path, seed, antithetic=antithetic)
+        # Positions are not in the trace, so they are drawn over the cells of the simulated highway
+        rng.CELL_LENGTH = (parameters or {}).get("CELL_LENGTH", rng.CELL_LENGTH)
+        return rng
+    return RNG(seed, parameters, inversion=inversion, antithetic=antithetic)
+
+
+def run_forked_replication(index: int, snapshot_path: str, seed):
+    """
+    Continue a snapshot under a fresh seed; module level so that it can be shipped to worker processes
+    """
+    simulator = Checkpoint.load(snapshot_path, index=index, seed=seed)
+    return replication_result(simulator)
+
+
+def replication_result(simulator: Simulator):
+    """
+    Run a simulator to the end and collect what the runner merges: final rates, rate series, per-station measures
+    and the sample means of the generated inputs (None when replaying a trace)
+    """
+    drop_rate, block_rate = simulator.run()
+    stream = simulator.arrival_stream
+    input_means = stream.input_means() if isinstance(stream, StochasticArrivalStream) else None
+    return (drop_rate, block_rate, simulator.statistics.drop_rate_series, simulator.statistics.block_rate_series,
+            simulator.station_statistics(), input_means)
+
+
+class ReplicationRunner:
+    def __init__(self, no_events_total: int, no_reserved: int, output_analyzer: OutputAnalyzer,
+                 warm_up_events: int = 0,
+                 stochastic: bool = True,
+                 seed: int = None,
+                 max_workers: int = None,
+                 scheduler: str = "heap",
+                 record_interval: int = 1,
+                 trace_path: str = "./data.csv",
+                 parameters: dict = None,
+                 pilot_iteration: int = 5,
+                 pilot_events: int = 5000,
+                 warm_up_method: str = "welch",
+                 antithetic: bool = False,
+                 control_variates: bool = False,
+                 empirical: bool = False,
+                 series_path: str = None,
+                 batch_size: int = None,
+                 no_channels: int = 10,
+                 no_stations: int = 20,
+                 cell_length: float = 2.0):
+        self.no_events_total = no_events_total
+        self.no_reserved = no_reserved
+        self.output_analyzer = output_analyzer
+        # None detects the warm-up from pilot replications (see detect_warm_up) on the first run. The transient of
+        # this model lasts a few hundred calls, so pilots need not be as long as the replications
+        self.warm_up_events = warm_up_events
+        self.pilot_iteration = pilot_iteration
+        self.pilot_events = min(pilot_events, no_events_total)
+        # "welch" or "mser", see OutputAnalyzer.warm_up; MSER finds no truncation (0) on this model's output
+        self.warm_up_method = warm_up_method
+        self.pilot_analyzer = None
+        self.stochastic = stochastic
+        # Root seed; replication i always gets the i-th child stream, whatever the number of workers
+        self.seed = seed
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count()
+        self.scheduler = scheduler
+        # Coarsened for long runs as in StreamingStatistics, so that the series in memory stay bounded
+        self.record_interval = StreamingStatistics.interval(no_events_total, record_interval)
+        self.trace_path = trace_path
+        # Topology of the highway, see Simulator
+        self.no_channels = no_channels
+        self.no_stations = no_stations
+        self.cell_length = cell_length
+        # Input distribution parameters, e.g. from DistributionFitter.load_parameters; None keeps the defaults.
+        # Arrivals are generated over the stations and cells of the topology unless the parameters say otherwise,
+        # in which case Simulator refuses the mismatch
+        self.parameters = dict({"BASE_STATION_MAX": no_stations, "CELL_LENGTH": cell_length}, **(parameters or {}))
+        # Bootstrap the inputs from the empirical distributions of the trace at trace_path (in stochastic mode, so
+        # runs are not limited to the length of the trace); see EmpiricalRandomNumberGenerator
+        if empirical and not stochastic:
+            raise Exception("Empirical inputs are generated in the stochastic mode")
+        self.empirical = empirical
+        # Variance reduction: replications in antithetic pairs (2i, 2i + 1) and/or control variates on the
+        # sample means of the inputs; see VarianceReduction
+        if control_variates and not stochastic:
+            raise Exception("Control variates need generated inputs")
+        self.antithetic = antithetic
+        self.control_variates = control_variates
+        self.input_means = []
+        # VarianceReduction estimates of the last run, by output name
+        self.estimates = {}
+        # Optional file the per-replication rate series are streamed to, see SeriesStore
+        self.series_store = SeriesStore(series_path, self.record_interval) if series_path is not None else None
+        # Replications per BatchSimulator (each worker advances one batch at a time, holding all its series in
+        # memory); None runs every replication on its own Simulator. Results are the same either way. Batching
+        # is slower for moderate numbers of replications and only pays off from a few hundred replications on
+        self.batch_size = batch_size
+
+    def run(self, iteration: int):
+        if not self.stochastic:
+            # Convert the trace once up front rather than racing to do it in every worker
+            TraceStore.load(self.trace_path)
+        # Both members of an antithetic pair share one child stream
+        no_seeds = iteration // 2 if self.antithetic else iteration
+        if self.antithetic and iteration % 2 != 0:
+            raise Exception("Antithetic replications come in pairs")
+        # Pilots take the child streams after the replications' ones, so they never reuse a replication's inputs
+        seeds = RNG.spawn_seeds(self.seed, no_seeds + self.pilot_iteration)
+        if self.warm_up_events is None:
+            self.detect_warm_up(seeds[no_seeds:])
+        if self.antithetic:
+            args = self.arguments(range(iteration), [seed for seed in seeds[:no_seeds] for _ in range(2)],
+                                  self.warm_up_events, antithetic=[i % 2 == 1 for i in range(iteration)])
+        else:
+            args = self.arguments(range(iteration), seeds, self.warm_up_events)
+        drop_rate_list, block_rate_list = self.merge(self.replicate(args))
+        self.estimate(drop_rate_list, block_rate_list)
+        return drop_rate_list, block_rate_list
+
+    def estimate(self, drop_rate_list: [float], block_rate_list: [float]):
+        """
+        Drop and block rate estimates of the replications just merged, with the variance reduction they achieved;
+        empty unless antithetic or control_variates is set
+        """
+        self.estimates = {}
+        if not (self.antithetic or self.control_variates):
+            return self.estimates
+        controls = control_means = None
+        if self.control_variates:
+            controls = self.input_means
+            if self.empirical:
+                control_means = EmpiricalRNG.from_trace(self.trace_path).input_means()
+            else:
+                control_means = RNG(parameters=self.parameters).input_means()
+        self.estimates = {name: VarianceReduction.estimate(values, controls, control_means, self.antithetic)
+                          for name, values in (("drop_rate", drop_rate_list), ("block_rate", block_rate_list))}
+        return self.estimates
+
+    def detect_warm_up(self, seeds: list):
+        """
+        Run one pilot replication of pilot_events calls per seed without warm-up and set warm_up_events to the
+        truncation point found on their mean drop and block series
+        """
+        self.pilot_analyzer = OutputAnalyzer(self.pilot_events, len(seeds), record_interval=self.record_interval)
+        args = self.arguments(range(len(seeds)), seeds, 0, no_events_total=self.pilot_events)
+        for i, result in enumerate(self.replicate(args)):
+            self.pilot_analyzer.update_data(i, result[2], result[3])
+        self.warm_up_events = self.pilot_analyzer.warm_up(self.warm_up_method)
+        return self.warm_up_events
+
+    def arguments(self, indices, seeds: list, warm_up_events: int, antithetic: [bool] = None,
+                  no_events_total: int = None):
+        # Antithetic runs draw every input by inversion, the second member of each pair from 1 - u
+        inversion = antithetic is not None
+        antithetic = antithetic if antithetic is not None else [False] * len(seeds)
+        no_events_total = no_events_total if no_events_total is not None else self.no_events_total
+        return [ReplicationArguments(index=i, no_events_total=no_events_total, no_reserved=self.no_reserved,
+                                     warm_up_events=warm_up_events, stochastic=self.stochastic, seed=seed,
+                                     scheduler=self.scheduler, record_interval=self.record_interval,
+                                     trace_path=self.trace_path, parameters=self.parameters, inversion=inversion,
+                                     antithetic=flag, empirical=self.empirical, no_channels=self.no_channels,
+                                     no_stations=self.no_stations, cell_length=self.cell_length)
+                for i, seed, flag in zip(indices, seeds, antithetic)]
+
+    def replicate(self, args: list):
+        """
+        Results of run_replication for every argument tuple, in order, computed in batches if batch_size is set
+        """
+        if self.batch_size is None:
+            return self.execute(run_replication, args)
+        batches = [(args[i:i + self.batch_size],) for i in range(0, len(args), self.batch_size)]
+        return itertools.chain.from_iterable(self.execute(run_batch, batches))
+
+    def execute(self, function, args: list):
+        """
+        Yield the results one at a time, so that each replication can be merged and dropped as soon as it is done
+        """
+        if self.max_workers == 1:
+            for arg in args:
+                yield function(*arg)
+            return
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            # map() yields results in submission order, so replication i is merged at index i
+            yield from executor.map(function, *zip(*args))
+
+    def save_warm_up(self, path: str):
+        """
+        Run the warm-up once and snapshot the warmed-up state for run_from_snapshot
+        """
+        if self.warm_up_events is None:
+            # The number of forks is not known yet, so pilots take the first child streams and the forks the ones
+            # after them (see run_from_snapshot); neither reuses the other's inputs
+            self.detect_warm_up(RNG.spawn_seeds(self.seed, self.pilot_iteration))
+        simulator = Simulator(index=0, no_events_total=self.no_events_total, output_analyzer=None,
+                              no_reserved=self.no_reserved, warm_up_events=self.warm_up_events,
+                              stochastic=self.stochastic,
+                              rng=replication_rng(self.seed, self.trace_path, self.parameters, inversion=False,
+                                                  antithetic=False, empirical=self.empirical),
+                              scheduler=self.scheduler, record_interval=self.record_interval,
+                              trace_path=self.trace_path, no_channels=self.no_channels, no_stations=self.no_stations,
+                              cell_length=self.cell_length)
+        simulator.advance(self.warm_up_events)
+        Checkpoint.save(simulator, path)
+
+    def run_from_snapshot(self, iteration: int, path: str):
+        """
+        Fork iteration replications from one snapshot, each reseeded with its own child stream
+        """
+        if self.antithetic:
+            raise Exception("Forked replications are not antithetic pairs")
+        seeds = RNG.spawn_seeds(self.seed, self.pilot_iteration + iteration)[self.pilot_iteration:]
+        drop_rate_list, block_rate_list = self.merge(self.execute(run_forked_replication,
+                                                                  [(i, path, seeds[i]) for i in range(iteration)]))
+        self.estimate(drop_rate_list, block_rate_list)
+        return drop_rate_list, block_rate_list
+
+    def merge(self, results):
+        drop_rate_list = []
+        block_rate_list = []
+        self.input_means = []
+        if self.series_store is not None:
+            self.series_store.clear()
+        for i, (drop_rate, block_rate, drop_rate_series, block_rate_series, station_statistics,
+                input_means) in enumerate(results):
+            self.output_analyzer.update_data(i, drop_rate_series, block_rate_series)
+            self.output_analyzer.update_station_data(i, station_statistics)
+            self.input_means.append(input_means)
+            if self.series_store is not None:
+                self.series_store.append(i, drop_rate_series, block_rate_series)
+            drop_rate_list.append(drop_rate)
+            block_rate_list.append(block_rate)
+        return drop_rate_list, block_rate_list
@@ -0,0 +1,79 @@
+import contextlib
+import inspect
+import io
+import unittest
+import warnings
+from libs.output_analysis import OutputAnalyzer
+from libs.runner import ReplicationRunner
+
+
+class TestReplicationRunner(unittest.TestCase):
+    def run_with(self, max_workers: int):
+        output_analyzer = OutputAnalyzer(500, no_iteration=3)
+        runner = ReplicationRunner(no_events_total=500, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                   max_workers=max_workers)
+        return runner.run(3), output_analyzer
+
+    def test_reproducible_across_worker_counts(self):
+        (serial, serial_analyzer) = self.run_with(1)
+        (parallel, parallel_analyzer) = self.run_with(2)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial_analyzer.drop_rate_mean.tolist(), parallel_analyzer.drop_rate_mean.tolist())
+
+    def test_single_plain_replication_runs_without_warnings(self):
+        output_analyzer = OutputAnalyzer(500, no_iteration=1)
+        runner = ReplicationRunner(no_events_total=500, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                   max_workers=1)
+        with warnings.catch_warnings(), contextlib.redirect_stdout(io.StringIO()):
+            warnings.simplefilter("error")
+            runner.run(1)
+        self.assertEqual({}, runner.estimates)
+
+    def test_results_are_streamed_to_merge(self):
+        runner = ReplicationRunner(no_events_total=500, no_reserved=1, output_analyzer=None, seed=7, max_workers=2)
+        results = runner.execute(pow, [(2, 3), (3, 2)])
+        self.assertTrue(inspect.isgenerator(results))
+        self.assertEqual([8, 9], list(results))
+
+    def test_topology_is_passed_to_every_replication(self):
+        results = []
+        for batch_size in (None, 2):
+            output_analyzer = OutputAnalyzer(1000, no_iteration=2)
+            runner = ReplicationRunner(no_events_total=1000, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                       max_workers=1, batch_size=batch_size, no_stations=30, no_channels=5,
+                                       cell_length=1.5)
+            with contextlib.redirect_stdout(io.StringIO()):
+                results.append((runner.run(2), output_analyzer.station_mean["utilization"].tolist()))
+        self.assertEqual(results[0], results[1])
+        utilization = results[0][1]
+        self.assertEqual(30, len(utilization))
+        self.assertTrue(all(u > 0 for u in utilization))
+
+    def test_replications_are_independent(self):
+        _, output_analyzer = self.run_with(1)
+        self.assertGreater(output_analyzer.block_rate_variance().max(), 0)
+
+    def test_detected_warm_up_is_used(self):
+        output_analyzer = OutputAnalyzer(4000, no_iteration=2)
+        runner = ReplicationRunner(no_events_total=4000, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                   max_workers=1, warm_up_events=None, pilot_iteration=3, pilot_events=2000)
+        runner.run(2)
+        self.assertEqual(runner.warm_up_events, runner.pilot_analyzer.welch_warm_up())
+        self.assertTrue(0 < runner.warm_up_events < 1000)
+        # Pilots stop at pilot_events calls, the replications run to no_events_total
+        self.assertEqual(2001, len(runner.pilot_analyzer.drop_rate_mean))
+        self.assertEqual(4001, len(output_analyzer.drop_rate_mean))
+
+    def test_variance_reduction_estimates(self):
+        output_analyzer = OutputAnalyzer(500, no_iteration=12)
+        runner = ReplicationRunner(no_events_total=500, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                   max_workers=1, antithetic=True, control_variates=True)
+        _, block_rate_list = runner.run(12)
+        self.assertNotEqual(block_rate_list[0], block_rate_list[1])
+        self.assertEqual(12, len(runner.input_means))
+        estimate = runner.estimates["block_rate"]
+        self.assertTrue(estimate["lower"] <= estimate["mean"] <= estimate["upper"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+from bisect import insort
+import heapq
+
+
+class BinaryHeapScheduler:
+    """
+    Future event list backed by a binary heap; O(log n) push and pop
+    """
+
+    def __init__(self):
+        self.heap = []
+
+    def push(self, entry: tuple):
+        heapq.heappush(self.heap, entry)
+
+    def pop(self):
+        return heapq.heappop(self.heap)
+
+    def peek(self):
+        return self.heap[0]
+
+    def __len__(self):
+        return len(self.heap)
+
+    def entries(self):
+        """
+        All pending entries, in no particular order
+        """
+        return list(self.heap)
+
+
+class CalendarQueueScheduler:
+    """
+    Future event list backed by a calendar queue (R. Brown, 1988); amortized O(1) push and pop.
+    Entries are hashed by time into buckets of a fixed width ("days"), each kept sorted; dequeueing walks the
+    buckets from the current day. The number of buckets doubles/halves with the population and the width is
+    re-estimated from the spacing of the earliest events on every resize
+    """
+
+    def __init__(self, no_buckets: int = 2, bucket_width: float = 1.0):
+        self.size = 0
+        self.last_time = 0.0
+        self.build(no_buckets, bucket_width)
+
+    def build(self, no_buckets: int, bucket_width: float):
+        self.no_buckets = no_buckets
+        self.bucket_width = bucket_width
+        self.buckets = [[] for _ in range(no_buckets)]
+        # Position of the "current day": bucket index and virtual (never wrapped) bucket number
+        self.day = int(self.last_time / bucket_width)
+        self.last_bucket = self.day % no_buckets
+        self.top_threshold = 2 * no_buckets
+        self.bottom_threshold = no_buckets // 2 - 2
+
+    def push(self, entry: tuple):
+        day = int(entry[0] / self.bucket_width)
+        insort(self.buckets[day % self.no_buckets], entry)
+        self.size += 1
+        if day < self.day:
+            # Scheduled before the current day; move back so that the scan does not miss it
+            self.last_time = entry[0]
+            self.day = day
+            self.last_bucket = day % self.no_buckets
+        if self.size > self.top_threshold:
+            self.resize(2 * self.no_buckets)
+
+    def pop(self):
+        bucket = self.buckets[self.locate()]
+        entry = bucket.pop(0)
+        self.size -= 1
+        self.last_time = entry[0]
+        if self.size < self.bottom_threshold:
+            self.resize(self.no_buckets // 2)
+        return entry
+
+    def peek(self):
+        return self.buckets[self.locate()][0]
+
+    def __len__(self):
+        return self.size
+
+    def entries(self):
+        """
+        All pending entries, in no particular order
+        """
+        return [entry for bucket in self.buckets for entry in bucket]
+
+    def locate(self):
+        """
+        Move the current day to the bucket holding the minimum entry and return its index
+        """
+        if self.size == 0:
+            raise IndexError("scheduler is empty")
+        i = self.last_bucket
+        day = self.day
+        width = self.bucket_width
+        for _ in range(self.no_buckets):
+            bucket = self.buckets[i]
+            if bucket and int(bucket[0][0] / width) <= day:
+                self.last_bucket = i
+                self.day = day
+                return i
+            i += 1
+            if i == self.no_buckets:
+                i = 0
+            day += 1
+        # Nothing due within a whole year; jump straight to the earliest entry
+        entry = min(bucket[0] for bucket in self.buckets if bucket)
+        self.day = int(entry[0] / width)
+        self.last_bucket = self.day % self.no_buckets
+        return self.last_bucket
+
+    def resize(self, no_buckets: int):
+        entries = self.entries()
+        self.build(no_buckets, self.estimate_width(entries))
+        for entry in entries:
+            insort(self.buckets[int(entry[0] / self.bucket_width) % self.no_buckets], entry)
+
+    def estimate_width(self, entries: [tuple]):
+        # Three times the average separation of the earliest events, ignoring outliers
+        sample = heapq.nsmallest(25, entries)
+        if len(sample) < 2:
+            return self.bucket_width
+        separations = [sample[i + 1][0] - sample[i][0] for i in range(len(sample) - 1)]
+        average = sum(separations) / len(separations)
+        separations = [x for x in separations if x <= 2 * average]
+        average = sum(separations) / len(separations) if separations else average
+        return 3 * average if average > 0 else self.bucket_width
+
+
+SCHEDULERS = {
+    "heap": BinaryHeapScheduler,
+    "calendar": CalendarQueueScheduler,
+}
+
+
+def create_scheduler(name: str):
+    if name not in SCHEDULERS:
+        raise Exception("Unknown scheduler")
+    return SCHEDULERS[name]()
@@ -0,0 +1,31 @@
+import random
+import unittest
+from libs.scheduler import BinaryHeapScheduler, CalendarQueueScheduler
+
+
+class TestScheduler(unittest.TestCase):
+    def test_calendar_queue_matches_heap(self):
+        rand = random.Random(4015)
+        heap, calendar = BinaryHeapScheduler(), CalendarQueueScheduler()
+        clock = 0.0
+        popped_heap, popped_calendar = [], []
+        for seq in range(20000):
+            # Hold model: mostly push-pop pairs around the clock, with the population growing then draining
+            if seq < 15000 or rand.random() < 0.3:
+                entry = (clock + rand.expovariate(1.0), seq)
+                heap.push(entry)
+                calendar.push(entry)
+            if len(heap) > 0 and rand.random() < 0.6:
+                self.assertEqual(heap.peek(), calendar.peek())
+                popped_heap.append(heap.pop())
+                popped_calendar.append(calendar.pop())
+                clock = popped_heap[-1][0]
+        while len(heap) > 0:
+            popped_heap.append(heap.pop())
+            popped_calendar.append(calendar.pop())
+        self.assertEqual(popped_heap, popped_calendar)
+        self.assertEqual(0, len(calendar))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+from libs.output_analysis import confidence_interval
+from libs.runner import replication_rng
+from libs.simulator import Simulator
+
+
+class SequentialRunner:
+    """
+    Single long run analysed with batch means, stopped as soon as the confidence intervals of both the drop and
+    the block rate are narrow enough.
+    After the warm-up, calls are grouped into batches of batch_size created calls. Whenever 2 * min_batches batches
+    have been collected, adjacent batches are merged pairwise (doubling the batch size) so that batch means grow
+    less correlated as the run gets longer while their number stays between min_batches and 2 * min_batches
+    """
+
+    def __init__(self, no_reserved: int, precision: float,
+                 warm_up_events: int = 0,
+                 batch_size: int = 1000,
+                 min_batches: int = 20,
+                 max_calls: int = 10 ** 8,
+                 confidence: float = 0.95,
+                 seed: int = None,
+                 parameters: dict = None,
+                 scheduler: str = "heap",
+                 no_channels: int = 10,
+                 no_stations: int = 20,
+                 cell_length: float = 2.0,
+                 stochastic: bool = True,
+                 trace_path: str = "./data.csv",
+                 empirical: bool = False):
+        self.no_reserved = no_reserved
+        # Target half-width of both confidence intervals, in percentage points
+        self.precision = precision
+        self.warm_up_events = warm_up_events
+        # Size of the first batches; batch_size is doubled by every pairwise merge
+        self.initial_batch_size = batch_size
+        self.batch_size = batch_size
+        self.min_batches = min_batches
+        self.max_calls = max_calls
+        self.confidence = confidence
+        self.seed = seed
+        self.scheduler = scheduler
+        # Topology of the highway, which the generated arrivals cover unless the parameters say otherwise
+        self.no_channels = no_channels
+        self.no_stations = no_stations
+        self.cell_length = cell_length
+        self.parameters = dict({"BASE_STATION_MAX": no_stations, "CELL_LENGTH": cell_length}, **(parameters or {}))
+        # Generated, replayed (the run then stops when the trace runs out) or bootstrapped inputs, as in
+        # ReplicationRunner
+        if empirical and not stochastic:
+            raise Exception("Empirical inputs are generated in the stochastic mode")
+        self.stochastic = stochastic
+        self.trace_path = trace_path
+        self.empirical = empirical
+        # Per-batch counts of created, dropped and blocked calls
+        self.batches = []
+        self.no_calls = 0
+
+    def run(self):
+        """
+        Return the (estimate, lower, upper) of the drop rate and of the block rate, in %, see intervals
+        """
+        self.batches = []
+        self.batch_size = self.initial_batch_size
+        # The rate series is not needed, so record a single point to keep the buffers at constant size
+        simulator = Simulator(index=0, no_events_total=self.max_calls, output_analyzer=None,
+                              no_reserved=self.no_reserved, warm_up_events=self.warm_up_events,
+                              stochastic=self.stochastic,
+                              rng=replication_rng(self.seed, self.trace_path, self.parameters, inversion=False,
+                                                  antithetic=False, empirical=self.empirical),
+                              scheduler=self.scheduler, record_interval=self.max_calls,
+                              trace_path=self.trace_path, no_channels=self.no_channels,
+                              no_stations=self.no_stations, cell_length=self.cell_length)
+        simulator.advance(self.warm_up_events)
+        while simulator.no_call_created < self.max_calls:
+            no_call_created = simulator.no_call_created
+            no_dropped_call = simulator.no_dropped_call
+            no_blocked_call = simulator.no_blocked_call
+            simulator.advance(min(no_call_created + self.batch_size, self.max_calls))
+            if simulator.no_call_created == no_call_created:
+                break
+            self.batches.append([simulator.no_call_created - no_call_created,
+                                 simulator.no_dropped_call - no_dropped_call,
+                                 simulator.no_blocked_call - no_blocked_call])
+            if len(self.batches) == 2 * self.min_batches:
+                self.merge_batches()
+            if self.converged():
+                break
+        self.no_calls = simulator.no_call_created
+        return self.intervals()
+
+    def merge_batches(self):
+        self.batches = [[a + b for a, b in zip(self.batches[i], self.batches[i + 1])]
+                        for i in range(0, len(self.batches), 2)]
+        self.batch_size *= 2
+
+    def intervals(self):
+        """
+        Point estimate (all calls counted after the warm-up, so a partial last batch weighs by its size) and batch
+        means confidence interval of the drop rate and of the block rate
+        """
+        no_created, no_dropped, no_blocked = (float(sum(column)) for column in zip(*self.batches))
+        drop_rate_list = [dropped / float(created) * 100 for created, dropped, _ in self.batches]
+        block_rate_list = [blocked / float(created) * 100 for created, _, blocked in self.batches]
+        return ((no_dropped / no_created * 100,) + tuple(confidence_interval(drop_rate_list, self.confidence)),
+                (no_blocked / no_created * 100,) + tuple(confidence_interval(block_rate_list, self.confidence)))
+
+    def is_precise(self):
+        return all((upper - lower) / 2 <= self.precision for _, lower, upper in self.intervals())
+
+    def converged(self):
+        """
+        Whether the stopping rule holds; false after run() when the inputs (e.g. a trace) or max_calls ran out first
+        """
+        return len(self.batches) >= self.min_batches and self.is_precise()
@@ -0,0 +1,56 @@
+import contextlib
+import io
+import unittest
+from libs.sequential import SequentialRunner
+
+
+class TestSequentialRunner(unittest.TestCase):
+    def run_quietly(self, runner: SequentialRunner):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return runner.run()
+
+    def test_stops_once_precise(self):
+        runner = SequentialRunner(no_reserved=1, precision=0.5, warm_up_events=500, batch_size=200, min_batches=10,
+                                  seed=3)
+        drop_rate, block_rate = self.run_quietly(runner)
+        self.assertTrue(runner.is_precise())
+        self.assertTrue(runner.min_batches <= len(runner.batches) < 2 * runner.min_batches)
+        # 2 * min_batches batches were reached at least once and merged
+        self.assertEqual(400, runner.batch_size)
+        # The last batch may be partial, and the warm-up is not in any batch
+        self.assertEqual(runner.no_calls - runner.warm_up_events, sum(batch[0] for batch in runner.batches))
+        for estimate, lower, upper in (drop_rate, block_rate):
+            self.assertTrue(lower <= estimate <= upper)
+        # One batch less was not enough
+        runner.batches = runner.batches[:-1]
+        self.assertFalse(len(runner.batches) >= runner.min_batches and runner.is_precise())
+
+    def test_merge_batches_pairwise(self):
+        runner = SequentialRunner(no_reserved=0, precision=1, batch_size=10, min_batches=2)
+        runner.batches = [[10, 1, 2], [10, 0, 1], [10, 3, 0], [7, 1, 1]]
+        runner.merge_batches()
+        self.assertEqual([[20, 1, 3], [17, 4, 1]], runner.batches)
+        self.assertEqual(20, runner.batch_size)
+        # The estimate weighs the partial batch by its size
+        (drop_rate, _, _), (block_rate, _, _) = runner.intervals()
+        self.assertAlmostEqual(5 / 37. * 100, drop_rate)
+        self.assertAlmostEqual(4 / 37. * 100, block_rate)
+
+    def test_more_calls_for_tighter_precision(self):
+        no_calls = []
+        for precision in (0.8, 0.4):
+            runner = SequentialRunner(no_reserved=1, precision=precision, batch_size=200, min_batches=10, seed=3)
+            self.run_quietly(runner)
+            no_calls.append(runner.no_calls)
+        self.assertLess(no_calls[0], no_calls[1])
+
+    def test_run_is_reentrant(self):
+        runner = SequentialRunner(no_reserved=1, precision=0.5, batch_size=200, min_batches=10, seed=3)
+        first = self.run_quietly(runner)
+        batches, batch_size, no_calls = runner.batches, runner.batch_size, runner.no_calls
+        self.assertEqual(first, self.run_quietly(runner))
+        self.assertEqual((batches, batch_size, no_calls), (runner.batches, runner.batch_size, runner.no_calls))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from libs.output_analysis import OutputAnalyzer, render_bands
+import numpy as np
+import os
+import zipfile
+
+
+class SeriesStore:
+    """
+    Per-replication rate series streamed to one compressed, columnar .npz file: every column of every replication
+    is its own deflated .npy member (e.g. drop_rate_000003.npy), appended as soon as the replication is merged, so
+    nothing but the replication at hand is ever held in memory. np.load(path) reads the file as usual
+    """
+    COLUMNS = ("drop_rate", "block_rate")
+
+    def __init__(self, path: str, record_interval: int = 1):
+        self.path = path
+        # Number of calls between two points, to put the x axis in calls
+        self.record_interval = record_interval
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    @classmethod
+    def member(cls, column: str, index: int):
+        return "{}_{:06d}.npy".format(column, index)
+
+    def append(self, index: int, drop_rate_series, block_rate_series):
+        with zipfile.ZipFile(self.path, "a", compression=zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+            for column, series in zip(self.COLUMNS, (drop_rate_series, block_rate_series)):
+                with archive.open(self.member(column, index), "w", force_zip64=True) as f:
+                    np.lib.format.write_array(f, np.asarray(series, dtype=float))
+
+    def replications(self):
+        prefix = self.COLUMNS[0] + "_"
+        with zipfile.ZipFile(self.path) as archive:
+            return sorted(int(name[len(prefix):-len(".npy")]) for name in archive.namelist()
+                          if name.startswith(prefix))
+
+    def load(self, column: str, index: int):
+        with zipfile.ZipFile(self.path) as archive:
+            with archive.open(self.member(column, index)) as f:
+                return np.lib.format.read_array(f)
+
+    def bands(self, confidence: float = 0.95):
+        """
+        Cross-replication mean and confidence bands of every point as in OutputAnalyzer.bands, merging the stored
+        replications one at a time
+        """
+        indices = self.replications()
+        # The series length is only known once read, and is not needed for the bands
+        output_analyzer = OutputAnalyzer(0, no_iteration=len(indices), record_interval=self.record_interval)
+        for index in indices:
+            output_analyzer.update_data(index, *(self.load(column, index) for column in self.COLUMNS))
+        return output_analyzer.bands(confidence)
+
+    def render(self, path: str, max_points: int = 2000, confidence: float = 0.95):
+        """
+        Save the mean drop and block rate curves with their confidence bands to path (.png, .svg, ...)
+        """
+        render_bands(path, self.bands(confidence),
+                     "Mean Summary Measures Of {} Simulations".format(len(self.replications())),
+                     self.record_interval, max_points)
@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from libs.output_analysis import OutputAnalyzer, lttb
+from libs.runner import ReplicationRunner
+
+
+class TestSeriesStore(unittest.TestCase):
+    def test_streamed_series_match_analyzer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_analyzer = OutputAnalyzer(1000, no_iteration=3, record_interval=10)
+            runner = ReplicationRunner(no_events_total=1000, no_reserved=1, output_analyzer=output_analyzer, seed=2,
+                                       max_workers=1, record_interval=10,
+                                       series_path=os.path.join(directory, "series.npz"))
+            runner.run(3)
+            store = runner.series_store
+            self.assertEqual([0, 1, 2], store.replications())
+            with np.load(store.path) as data:
+                self.assertEqual(101, len(data["block_rate_000002"]))
+            bands = store.bands()
+            for name, expected in output_analyzer.bands().items():
+                for expected_band, band in zip(expected, bands[name]):
+                    self.assertEqual(expected_band.tolist(), band.tolist())
+            for name in ("bands.png", "bands.svg"):
+                store.render(os.path.join(directory, name), max_points=50)
+                self.assertGreater(os.path.getsize(os.path.join(directory, name)), 0)
+
+    def test_lttb_keeps_extremes(self):
+        x = np.arange(10000.)
+        y = np.sin(x / 500.)
+        y[4321] = 5
+        kept = lttb(x, y, 100)
+        self.assertEqual(100, len(kept))
+        self.assertEqual([0, 9999], [kept[0], kept[-1]])
+        self.assertIn(4321, kept)
+        self.assertTrue(np.all(np.diff(kept) > 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
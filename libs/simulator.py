@@ -0,0 +1,261 @@
+from libs.arrival_stream import ArrivalStream, StochasticArrivalStream, TraceArrivalStream
+from libs.event import Event
+from libs.instrumentation import Instrumentation
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.scheduler import create_scheduler
+from libs.streaming_statistics import StreamingStatistics
+from libs.output_analysis import OutputAnalyzer
+from libs.trace_store import TraceStore
+import itertools
+import numpy as np
+
+
+def check_topology(rng: RNG, no_stations: int, cell_length: float, stochastic: bool = True,
+                   trace_path: str = "./data.csv", no_calls: int = None):
+    """
+    Make sure that generated arrivals cover exactly stations 1 ... no_stations with cells of cell_length, and that
+    the first no_calls calls of a replayed trace all fall on the highway
+    """
+    if rng.CELL_LENGTH != cell_length:
+        raise Exception("Generator cell length differs from the highway's")
+    if stochastic:
+        if rng.BASE_STATION_MIN != 1 or rng.BASE_STATION_MAX != no_stations:
+            raise Exception("Generator base stations differ from the highway's")
+        return
+    stations = TraceStore.load(trace_path)["base_station"][:no_calls]
+    if len(stations) > 0 and (stations.min() < 1 or stations.max() > no_stations):
+        raise Exception("Trace base station outside the highway")
+
+
+class Simulator:
+    def __init__(self, index: int, no_events_total: int, output_analyzer: OutputAnalyzer, no_reserved: int,
+                 warm_up_events: int = 0,
+                 stochastic: bool = True,
+                 rng: RNG = None,
+                 scheduler: str = "heap",
+                 record_interval: int = 1,
+                 arrival_stream: ArrivalStream = None,
+                 trace_path: str = "./data.csv",
+                 no_channels: int = 10,
+                 no_stations: int = 20,
+                 cell_length: float = 2.0,
+                 instrumentation: Instrumentation = None):
+        """
+        Initialize state variables
+        """
+        # System clock
+        self.clock = 0
+        # Number of calls
+        self.no_call_created = 0
+        self.no_dropped_call = 0
+        self.no_blocked_call = 0
+        self.no_handover_call = 0
+        self.no_terminated_call = 0
+        # Warm up
+        self.warm_up_events = warm_up_events
+        # Number of events
+        self.no_events_total = no_events_total
+        # Topology: stations 1 ... no_stations along the highway, each covering cell_length km
+        self.no_stations = no_stations
+        self.no_channels = no_channels
+        self.cell_length = cell_length
+        # Index 0 and no_stations + 1 are not used; only [1 ... no_stations] is used
+        self.no_free_channel = [no_channels for _ in range(no_stations + 2)]
+        # Per-station sums of the times at which a channel was taken / freed, and at which the station became full /
+        # stopped being full. Busy channel-seconds and seconds at full capacity follow from them at any time in
+        # O(stations), see station_areas, so each event only pays a couple of additions
+        self.allocation_time_sum = [0. for _ in range(no_stations + 2)]
+        self.release_time_sum = [0. for _ in range(no_stations + 2)]
+        self.full_start_time_sum = [0. for _ in range(no_stations + 2)]
+        self.full_end_time_sum = [0. for _ in range(no_stations + 2)]
+        self.no_reserved = no_reserved
+        self.stochastic = stochastic
+        # Event list (a priority queue of event entries, see Event); "heap" or "calendar", see libs.scheduler
+        self.scheduler = scheduler
+        self.event_list = create_scheduler(scheduler)
+        # Tie-breaker so that entries are ordered by (arrival_time, seq) and never compared further
+        self.sequence = itertools.count()
+        # Handlers indexed by event type code
+        self.handlers = (self.handle_initialization, self.handle_handover, self.handle_termination)
+        # Analysis
+        self.output_analyzer = output_analyzer
+        # Rate series sampled every record_interval calls, see StreamingStatistics
+        self.statistics = StreamingStatistics(no_events_total, warm_up_events, record_interval)
+        self.record_interval = self.statistics.record_interval
+        self.index = index
+        # Every replication draws from its own stream so that replications are independent and reproducible
+        if rng is None:
+            rng = RNG(parameters={"BASE_STATION_MAX": no_stations, "CELL_LENGTH": cell_length})
+        self.rng = rng
+        # Calls are pulled lazily from the stream; by default generated or replayed from the trace at trace_path
+        if arrival_stream is None:
+            check_topology(rng, no_stations, cell_length, stochastic, trace_path, no_events_total)
+            if stochastic:
+                arrival_stream = StochasticArrivalStream(self.rng, no_calls=no_events_total)
+            else:
+                arrival_stream = TraceArrivalStream(self.rng, path=trace_path, no_calls=no_events_total)
+        self.arrival_stream = arrival_stream
+        self.trace_path = trace_path
+        self.started = False
+        # Opt-in probes, see Instrumentation; nothing in the event loop checks for them
+        self.instrumentation = instrumentation
+        if instrumentation is not None:
+            instrumentation.attach(self)
+
+    def run(self):
+        self.advance()
+        return self.finish()
+
+    def advance(self, no_calls: int = None):
+        """
+        Process events until no_calls calls have been created, or until the event list runs empty
+        """
+        limit = no_calls if no_calls is not None else float("inf")
+        arrivals = self.arrival_stream
+        if not self.started:
+            # Add the first event
+            self.started = True
+            arrival = next(arrivals, None)
+            if arrival is not None:
+                self.event_list.push((self.clock + arrival[0], next(self.sequence), Event.INITIALIZATION) +
+                                     arrival[1:])
+        while len(self.event_list) > 0 and self.no_call_created < limit:
+            # Deque event from list until it is empty
+            entry = self.event_list.pop()
+            self.handle_event(entry)
+            # Only one arrival is pending at a time: schedule the next one when the current call comes in
+            if entry[2] == Event.INITIALIZATION:
+                arrival = next(arrivals, None)
+                if arrival is not None:
+                    self.event_list.push((entry[0] + arrival[0], next(self.sequence), Event.INITIALIZATION) +
+                                         arrival[1:])
+
+    def finish(self):
+        # Update analyzer
+        if self.output_analyzer is not None:
+            self.output_analyzer.update_data(self.index, self.statistics.drop_rate_series,
+                                             self.statistics.block_rate_series)
+            self.output_analyzer.update_station_data(self.index, self.station_statistics())
+        print("{} blocked, {} dropped, {} terminated".format(self.no_blocked_call, self.no_dropped_call,
+                                                             self.no_terminated_call))
+        return self.statistics.rates(self.no_call_created, self.no_dropped_call, self.no_blocked_call)
+
+    def schedule(self, event: Event):
+        """
+        Push an Event object onto the event list
+        """
+        self.event_list.push(event.to_entry(next(self.sequence)))
+
+    def handle_event(self, entry: tuple):
+        arrival_time, _, event_type, station, duration, direction, speed, position = entry
+        self.handlers[event_type](arrival_time, speed, station, position, duration, direction)
+        # Update statistics
+        if self.no_call_created % self.record_interval == 0:
+            self.statistics.record(self.no_call_created, self.no_dropped_call, self.no_blocked_call)
+
+    def handle_initialization(self, time: float, speed: float, station: int, position: float, duration: float,
+                              direction: int):
+        # Update system clock
+        self.clock = time
+        if self.no_call_created == self.warm_up_events:
+            self.statistics.mark_warm_up(self.no_dropped_call, self.no_blocked_call)
+            self.statistics.mark_station_warm_up(self.clock, *self.station_areas())
+        self.no_call_created += 1
+        # Check available channel from current station
+        if self.no_free_channel[station] - self.no_reserved <= 0:
+            # If no available channel, the call is blocked
+            self.no_blocked_call += 1
+            return
+        # Allocate that channel
+        no_free_channel = self.no_free_channel[station] - 1
+        self.no_free_channel[station] = no_free_channel
+        self.allocation_time_sum[station] += time
+        if no_free_channel == 0:
+            self.full_start_time_sum[station] += time
+        if direction == Event.LEFT:
+            time_to_handover = position / speed * 3600  # Hour to second
+            next_station = station - 1
+        elif direction == Event.RIGHT:
+            time_to_handover = (self.cell_length - position) / speed * 3600  # Hour to second
+            next_station = station + 1
+        else:
+            raise Exception("Unknown direction")
+        self.schedule_next(station, next_station, duration, time_to_handover, direction, speed)
+
+    def handle_handover(self, time: float, speed: float, station: int, position: float, duration: float,
+                        direction: int):
+        self.clock = time
+        if direction == Event.LEFT:
+            last_station = station + 1
+            next_station = station - 1
+        elif direction == Event.RIGHT:
+            last_station = station - 1
+            next_station = station + 1
+        else:
+            raise Exception("Unknown direction")
+        # Free the channel from used station
+        self.release(time, last_station)
+        no_free_channel = self.no_free_channel[station]
+        if no_free_channel == 0:
+            # If no free channel, drop the call
+            self.no_dropped_call += 1
+            return
+        # Allocate a channel from current station
+        self.no_free_channel[station] = no_free_channel - 1
+        self.allocation_time_sum[station] += time
+        if no_free_channel == 1:
+            self.full_start_time_sum[station] += time
+        # Plan the next handover
+        time_to_handover = self.cell_length / speed * 3600  # Hour to second
+        self.schedule_next(station, next_station, duration, time_to_handover, direction, speed)
+
+    def handle_termination(self, time: float, speed: float, station: int, position: float, duration: float,
+                           direction: int):
+        self.clock = time
+        # Free the channel
+        self.release(time, station)
+        self.no_terminated_call += 1
+
+    def release(self, time: float, station: int):
+        """
+        Free a channel of station at time, keeping the occupancy sums up to date
+        """
+        no_free_channel = self.no_free_channel[station]
+        if no_free_channel == 0:
+            self.full_end_time_sum[station] += time
+        self.no_free_channel[station] = no_free_channel + 1
+        self.release_time_sum[station] += time
+
+    def station_areas(self):
+        """
+        Busy channel-seconds and seconds at full capacity of every station (index 0 ... no_stations + 1) from time
+        0 to the clock: a channel taken at a and freed at r contributes r - a, one still held contributes clock - a
+        """
+        no_free_channel = np.array(self.no_free_channel)
+        busy_area = (np.array(self.release_time_sum) - np.array(self.allocation_time_sum) +
+                     (self.no_channels - no_free_channel) * self.clock)
+        full_area = (np.array(self.full_end_time_sum) - np.array(self.full_start_time_sum) +
+                     (no_free_channel == 0) * self.clock)
+        return busy_area, full_area
+
+    def station_statistics(self):
+        """
+        Time-weighted per-station measures after the warm-up, as arrays over stations 1 ... no_stations
+        """
+        return self.statistics.station_measures(self.clock, *self.station_areas(), self.no_channels)
+
+    def schedule_next(self, station: int, next_station: int, duration: float, time_to_handover: float,
+                      direction: int, speed: float):
+        # Decide whether to terminate the call
+        if duration <= time_to_handover:
+            # Finishing call
+            self.event_list.push((self.clock + duration, next(self.sequence), Event.TERMINATION,
+                                  station, 0, direction, speed, 0))
+        elif next_station == 0 or next_station > self.no_stations:
+            # Leaving highway
+            self.event_list.push((self.clock + time_to_handover, next(self.sequence), Event.TERMINATION,
+                                  station, 0, direction, speed, 0))
+        else:
+            # Schedule the next handover
+            self.event_list.push((self.clock + time_to_handover, next(self.sequence), Event.HANDOVER,
+                                  next_station, duration - time_to_handover, direction, speed, 0))
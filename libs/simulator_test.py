@@ -0,0 +1,35 @@
+import contextlib
+import io
+import unittest
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+
+
+class TestSimulator(unittest.TestCase):
+    def test_generator_must_match_topology(self):
+        with self.assertRaises(Exception):
+            Simulator(index=0, no_events_total=100, output_analyzer=None, no_reserved=0, rng=RNG(1), no_stations=30)
+        with self.assertRaises(Exception):
+            Simulator(index=0, no_events_total=100, output_analyzer=None, no_reserved=0, rng=RNG(1), cell_length=1.)
+        simulator = Simulator(index=0, no_events_total=100, output_analyzer=None, no_reserved=0,
+                              rng=RNG(1, {"BASE_STATION_MAX": 30, "CELL_LENGTH": 1.}), no_stations=30,
+                              cell_length=1.)
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator.run()
+        self.assertEqual(100, simulator.no_call_created)
+
+    def test_trace_stations_must_be_on_the_highway(self):
+        # The trace covers stations 1 ... 20
+        with self.assertRaises(Exception) as context:
+            Simulator(index=0, no_events_total=100, output_analyzer=None, no_reserved=0, stochastic=False,
+                      rng=RNG(1, {"BASE_STATION_MAX": 10}), no_stations=10)
+        self.assertNotIsInstance(context.exception, IndexError)
+        simulator = Simulator(index=0, no_events_total=100, output_analyzer=None, no_reserved=0, stochastic=False,
+                              no_stations=25)
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator.run()
+        self.assertEqual(100, simulator.no_call_created)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import numpy as np
+
+
+class StreamingStatistics:
+    """
+    Constant-memory statistics of one replication. Final rates come from the simulator's running counters and a
+    single snapshot taken at the end of the warm-up; the drop/block rate time series is sampled every
+    record_interval calls into fixed-size buffers of at most MAX_POINTS points
+    """
+    MAX_POINTS = 100000
+
+    def __init__(self, no_events_total: int, warm_up_events: int = 0, record_interval: int = 1):
+        self.warm_up_events = warm_up_events
+        record_interval = self.interval(no_events_total, record_interval)
+        self.record_interval = record_interval
+        # Point i holds the rates after the last event processed while i * record_interval calls had been created
+        self.drop_rate_series = np.zeros(no_events_total // record_interval + 1)
+        self.block_rate_series = np.zeros(no_events_total // record_interval + 1)
+        # Counters at the end of the warm-up
+        self.no_dropped_call_at_warm_up = 0
+        self.no_blocked_call_at_warm_up = 0
+        # Clock and per-station busy channel-seconds and seconds at full capacity at the end of the warm-up
+        self.time_at_warm_up = 0.
+        self.busy_area_at_warm_up = 0.
+        self.full_area_at_warm_up = 0.
+
+    @classmethod
+    def interval(cls, no_events_total: int, record_interval: int = 1):
+        """
+        Calls between two points of the series: record_interval, coarsened for long runs so that the series never
+        holds more than MAX_POINTS points
+        """
+        return max(record_interval, -(-no_events_total // cls.MAX_POINTS))
+
+    def record(self, no_call_created: int, no_dropped_call: int, no_blocked_call: int):
+        i = no_call_created // self.record_interval
+        self.drop_rate_series[i] = no_dropped_call / float(no_call_created) * 100
+        self.block_rate_series[i] = no_blocked_call / float(no_call_created) * 100
+
+    def mark_warm_up(self, no_dropped_call: int, no_blocked_call: int):
+        self.no_dropped_call_at_warm_up = no_dropped_call
+        self.no_blocked_call_at_warm_up = no_blocked_call
+
+    def mark_station_warm_up(self, time: float, busy_area: np.ndarray, full_area: np.ndarray):
+        self.time_at_warm_up = time
+        self.busy_area_at_warm_up = busy_area
+        self.full_area_at_warm_up = full_area
+
+    def station_measures(self, time: float, busy_area: np.ndarray, full_area: np.ndarray, no_channels: int):
+        """
+        Time averages over [end of warm-up, time] of stations 1 ... no_stations: mean number of busy channels
+        (occupancy), occupancy / no_channels (utilization) and fraction of time with no free channel (full)
+        """
+        duration = time - self.time_at_warm_up
+        if duration <= 0:
+            no_stations = len(busy_area) - 2
+            return {"occupancy": np.zeros(no_stations), "utilization": np.zeros(no_stations),
+                    "full": np.zeros(no_stations)}
+        occupancy = (busy_area - self.busy_area_at_warm_up)[1:-1] / duration
+        return {
+            "occupancy": occupancy,
+            "utilization": occupancy / no_channels,
+            "full": (full_area - self.full_area_at_warm_up)[1:-1] / duration,
+        }
+
+    def rates(self, no_call_created: int, no_dropped_call: int, no_blocked_call: int):
+        """
+        Drop and block rates (in %) of the calls created after the warm-up
+        """
+        no_counted_call = float(no_call_created - self.warm_up_events)
+        drop_rate = (no_dropped_call - self.no_dropped_call_at_warm_up) / no_counted_call * 100
+        block_rate = (no_blocked_call - self.no_blocked_call_at_warm_up) / no_counted_call * 100
+        return drop_rate, block_rate
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+import numpy as np
+from libs.instrumentation import Instrumentation
+from libs.output_analysis import OutputAnalyzer
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.runner import ReplicationRunner
+from libs.simulator import Simulator
+from libs.streaming_statistics import StreamingStatistics
+
+
+class TestStreamingStatistics(unittest.TestCase):
+    def test_record_interval_subsamples_series(self):
+        full = Simulator(index=0, no_events_total=1000, output_analyzer=None, no_reserved=1, warm_up_events=100,
+                         rng=RNG(3))
+        sampled = Simulator(index=0, no_events_total=1000, output_analyzer=None, no_reserved=1,
+                            warm_up_events=100, rng=RNG(3), record_interval=50)
+        self.assertEqual(full.run(), sampled.run())
+        self.assertEqual(21, len(sampled.statistics.drop_rate_series))
+        self.assertEqual(full.statistics.drop_rate_series[::50].tolist(), sampled.statistics.drop_rate_series.tolist())
+
+    def test_series_length_is_bounded(self):
+        statistics = StreamingStatistics(10 ** 8)
+        self.assertEqual(10 ** 8 // StreamingStatistics.MAX_POINTS, statistics.record_interval)
+        self.assertEqual(StreamingStatistics.MAX_POINTS + 1, len(statistics.drop_rate_series))
+        # A coarser interval than the budget needs is kept
+        self.assertEqual(5000, StreamingStatistics(10 ** 8, record_interval=5000).record_interval)
+
+    def test_long_runs_coarsen_the_series_everywhere(self):
+        with mock.patch.object(StreamingStatistics, "MAX_POINTS", 100):
+            full = Simulator(index=0, no_events_total=1000, output_analyzer=None, no_reserved=1, rng=RNG(3))
+            output_analyzer = OutputAnalyzer(1000, no_iteration=2)
+            runner = ReplicationRunner(no_events_total=1000, no_reserved=1, output_analyzer=output_analyzer, seed=7,
+                                       max_workers=1, batch_size=2)
+            with contextlib.redirect_stdout(io.StringIO()):
+                full.run()
+                runner.run(2)
+        self.assertEqual(101, len(full.statistics.drop_rate_series))
+        self.assertEqual(10, runner.record_interval)
+        self.assertEqual(10, output_analyzer.record_interval)
+        self.assertEqual(101, len(output_analyzer.drop_rate_mean))
+
+    def test_station_measures_match_event_by_event_integration(self):
+        # Integrate the channel counts between consecutive events, from the arrival that ends the warm-up
+        state = {"start": None, "last": None, "busy": np.zeros(20), "full": np.zeros(20)}
+
+        def integrate(simulator, entry):
+            if state["last"] is not None:
+                time, free = state["last"]
+                state["busy"] += (10 - free) * (entry[0] - time)
+                state["full"] += (free == 0) * (entry[0] - time)
+            if simulator.no_call_created > 200:
+                if state["start"] is None:
+                    state["start"] = entry[0]
+                state["last"] = (entry[0], np.array(simulator.no_free_channel[1:-1]))
+
+        instrumentation = Instrumentation(timing=False)
+        for event_type in range(3):
+            instrumentation.on(event_type, integrate)
+        simulator = Simulator(index=0, no_events_total=2000, output_analyzer=None, no_reserved=1,
+                              warm_up_events=200, rng=RNG(5), instrumentation=instrumentation)
+        simulator.run()
+        measures = simulator.station_statistics()
+        duration = simulator.clock - state["start"]
+        self.assertTrue(np.allclose(state["busy"] / duration, measures["occupancy"]))
+        self.assertTrue(np.allclose(state["full"] / duration, measures["full"]))
+        self.assertTrue(np.allclose(measures["occupancy"] / 10, measures["utilization"]))
+
+    def test_station_measures_aggregate_across_replications(self):
+        output_analyzer = OutputAnalyzer(1000, no_iteration=2)
+        for seed in (1, 2):
+            Simulator(index=seed - 1, no_events_total=1000, output_analyzer=output_analyzer, no_reserved=1,
+                      rng=RNG(seed)).run()
+        self.assertEqual((20,), output_analyzer.station_mean["utilization"].shape)
+        self.assertTrue(0 < output_analyzer.station_mean["utilization"].mean() < 1)
+        self.assertGreater(output_analyzer.station_variance("occupancy").max(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+from concurrent.futures import ProcessPoolExecutor
+from libs.arrival_stream import CachedArrivalStream, StochasticArrivalStream, TraceArrivalStream
+from libs.output_analysis import confidence_interval
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator, check_topology
+from libs.trace_store import TraceStore
+import csv
+import itertools
+import numpy as np
+import os
+import shutil
+import tempfile
+
+
+def run_configuration(cache_path: str, no_events_total: int, no_reserved: int, no_channels: int,
+                      warm_up_events: int, scheduler: str, no_stations: int = 20, cell_length: float = 2.0):
+    """
+    Replay one cached replication under one configuration; module level so that it can be shipped to workers
+    """
+    simulator = Simulator(index=0, no_events_total=no_events_total, output_analyzer=None, no_reserved=no_reserved,
+                          warm_up_events=warm_up_events, scheduler=scheduler, record_interval=no_events_total,
+                          arrival_stream=CachedArrivalStream(np.load(cache_path, mmap_mode="r")),
+                          no_channels=no_channels, no_stations=no_stations, cell_length=cell_length)
+    return simulator.run()
+
+
+class ParameterSweep:
+    """
+    Evaluate a grid of (no_reserved, no_channels) configurations with common random numbers: the arrivals of each
+    replication are generated once, cached on disk and replayed under every configuration, so that differences
+    between configurations are not blurred by sampling noise. All (configuration, replication) pairs run in
+    parallel
+    """
+
+    def __init__(self, no_events_total: int, no_reserved_list: [int], no_channels_list: [int] = (10,),
+                 warm_up_events: int = 0,
+                 stochastic: bool = True,
+                 seed: int = None,
+                 parameters: dict = None,
+                 trace_path: str = "./data.csv",
+                 max_workers: int = None,
+                 scheduler: str = "heap",
+                 no_stations: int = 20,
+                 cell_length: float = 2.0):
+        self.no_events_total = no_events_total
+        self.configurations = list(itertools.product(no_reserved_list, no_channels_list))
+        self.warm_up_events = warm_up_events
+        self.stochastic = stochastic
+        self.seed = seed
+        # Topology of the highway besides the channels, see Simulator; the arrivals are generated over it unless
+        # the parameters say otherwise, in which case run refuses the mismatch
+        self.no_stations = no_stations
+        self.cell_length = cell_length
+        self.parameters = dict({"BASE_STATION_MAX": no_stations, "CELL_LENGTH": cell_length}, **(parameters or {}))
+        self.trace_path = trace_path
+        self.max_workers = max_workers if max_workers is not None else os.cpu_count()
+        self.scheduler = scheduler
+        # Per-replication (drop_rate, block_rate) lists of every configuration, in replication order
+        self.drop_rates = {}
+        self.block_rates = {}
+
+    def cache_inputs(self, directory: str, iteration: int):
+        """
+        Write the arrivals of every replication to a .npy file, one chunk at a time straight into the memory-mapped
+        file, so that no replication is ever held in memory as a whole
+        """
+        no_calls = self.no_events_total
+        if not self.stochastic:
+            no_calls = min(no_calls, len(TraceStore.load(self.trace_path)["inter_arrival_time"]))
+        paths = []
+        for i, seed in enumerate(RNG.spawn_seeds(self.seed, iteration)):
+            rng = RNG(seed, self.parameters)
+            if self.stochastic:
+                stream = StochasticArrivalStream(rng, no_calls=no_calls)
+            else:
+                stream = TraceArrivalStream(rng, path=self.trace_path, no_calls=no_calls)
+            paths.append(os.path.join(directory, "replication_{}.npy".format(i)))
+            arrivals = np.lib.format.open_memmap(paths[-1], mode="w+", dtype=CachedArrivalStream.DTYPE,
+                                                 shape=(no_calls,))
+            no_written = 0
+            while no_written < no_calls:
+                chunk = stream.next_array()
+                arrivals[no_written:no_written + len(chunk)] = chunk
+                no_written += len(chunk)
+            arrivals.flush()
+            del arrivals
+        return paths
+
+    def run(self, iteration: int):
+        if not self.stochastic:
+            TraceStore.load(self.trace_path)
+        check_topology(RNG(parameters=self.parameters), self.no_stations, self.cell_length, self.stochastic,
+                       self.trace_path, self.no_events_total)
+        directory = tempfile.mkdtemp(prefix="sweep_")
+        try:
+            paths = self.cache_inputs(directory, iteration)
+            tasks = [(path, self.no_events_total, no_reserved, no_channels, self.warm_up_events, self.scheduler,
+                      self.no_stations, self.cell_length)
+                     for no_reserved, no_channels in self.configurations for path in paths]
+            if self.max_workers == 1:
+                results = [run_configuration(*task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                    results = list(executor.map(run_configuration, *zip(*tasks)))
+        finally:
+            shutil.rmtree(directory)
+        for j, configuration in enumerate(self.configurations):
+            rates = results[j * iteration:(j + 1) * iteration]
+            self.drop_rates[configuration] = [drop_rate for drop_rate, _ in rates]
+            self.block_rates[configuration] = [block_rate for _, block_rate in rates]
+        return self.table()
+
+    def table(self):
+        """
+        One row per configuration with the mean rates and their 95% confidence intervals
+        """
+        rows = []
+        for no_reserved, no_channels in self.configurations:
+            row = {"no_reserved": no_reserved, "no_channels": no_channels}
+            for name, rates in (("drop_rate", self.drop_rates), ("block_rate", self.block_rates)):
+                data = rates[(no_reserved, no_channels)]
+                row[name] = float(np.mean(data))
+                row[name + "_lower"], row[name + "_upper"] = (float(x) for x in confidence_interval(data))
+            rows.append(row)
+        return rows
+
+    def compare(self, configuration_a: tuple, configuration_b: tuple):
+        """
+        95% confidence intervals of the paired differences (a - b) of the drop and block rates; pairing by
+        replication is what makes common random numbers pay off
+        """
+        return tuple(confidence_interval(np.subtract(rates[configuration_a], rates[configuration_b]))
+                     for rates in (self.drop_rates, self.block_rates))
+
+    def write_csv(self, path: str):
+        rows = self.table()
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
@@ -0,0 +1,72 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+from libs.arrival_stream import CachedArrivalStream, StochasticArrivalStream
+from libs.output_analysis import confidence_interval
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.simulator import Simulator
+from libs.sweep import ParameterSweep
+
+
+class TestParameterSweep(unittest.TestCase):
+    def test_cached_inputs_match_the_stream(self):
+        sweep = ParameterSweep(no_events_total=25000, no_reserved_list=[0], seed=5)
+        with tempfile.TemporaryDirectory() as directory:
+            paths = sweep.cache_inputs(directory, 2)
+            for path, seed in zip(paths, RNG.spawn_seeds(5, 2)):
+                expected = CachedArrivalStream.record(StochasticArrivalStream(RNG(seed), no_calls=25000))
+                self.assertEqual(expected.tolist(), np.load(path).tolist())
+            self.assertEqual(["replication_0.npy", "replication_1.npy"], sorted(os.listdir(directory)))
+
+    def test_every_configuration_replays_the_same_arrivals(self):
+        iteration = 3
+        sweep = ParameterSweep(no_events_total=800, no_reserved_list=[0, 2], no_channels_list=[8, 10], seed=9,
+                               max_workers=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            rows = sweep.run(iteration)
+            # Replication i of every configuration is driven by the arrivals of the i-th child stream
+            for no_reserved, no_channels in sweep.configurations:
+                expected = [Simulator(index=0, no_events_total=800, output_analyzer=None, no_reserved=no_reserved,
+                                      rng=RNG(seed), record_interval=800, no_channels=no_channels).run()
+                            for seed in RNG.spawn_seeds(9, iteration)]
+                self.assertEqual([drop_rate for drop_rate, _ in expected], sweep.drop_rates[(no_reserved,
+                                                                                             no_channels)])
+                self.assertEqual([block_rate for _, block_rate in expected], sweep.block_rates[(no_reserved,
+                                                                                               no_channels)])
+        self.assertEqual([(0, 8), (0, 10), (2, 8), (2, 10)],
+                         [(row["no_reserved"], row["no_channels"]) for row in rows])
+        for row in rows:
+            block_rates = sweep.block_rates[(row["no_reserved"], row["no_channels"])]
+            self.assertEqual(float(np.mean(block_rates)), row["block_rate"])
+            self.assertEqual(tuple(float(x) for x in confidence_interval(block_rates)),
+                             (row["block_rate_lower"], row["block_rate_upper"]))
+        drop_interval, block_interval = sweep.compare((2, 10), (0, 10))
+        differences = np.subtract(sweep.block_rates[(2, 10)], sweep.block_rates[(0, 10)])
+        self.assertEqual(tuple(confidence_interval(differences)), tuple(block_interval))
+        differences = np.subtract(sweep.drop_rates[(2, 10)], sweep.drop_rates[(0, 10)])
+        self.assertEqual(tuple(confidence_interval(differences)), tuple(drop_interval))
+
+    def test_topology_is_passed_to_every_configuration(self):
+        sweep = ParameterSweep(no_events_total=800, no_reserved_list=[1], no_channels_list=[6], seed=4,
+                               max_workers=1, no_stations=30, cell_length=1.5)
+        with contextlib.redirect_stdout(io.StringIO()):
+            sweep.run(2)
+            for i, seed in enumerate(RNG.spawn_seeds(4, 2)):
+                rng = RNG(seed, {"BASE_STATION_MAX": 30, "CELL_LENGTH": 1.5})
+                expected = Simulator(index=0, no_events_total=800, output_analyzer=None, no_reserved=1, rng=rng,
+                                     record_interval=800, no_channels=6, no_stations=30, cell_length=1.5).run()
+                self.assertEqual(expected, (sweep.drop_rates[(1, 6)][i], sweep.block_rates[(1, 6)][i]))
+
+    def test_parameters_must_match_topology(self):
+        sweep = ParameterSweep(no_events_total=800, no_reserved_list=[1], seed=4, max_workers=1,
+                               parameters={"BASE_STATION_MAX": 30})
+        with self.assertRaises(Exception) as context:
+            sweep.run(2)
+        self.assertNotIsInstance(context.exception, IndexError)
+
+
+if __name__ == '__main__':
+    unittest.main()
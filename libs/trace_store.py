@@ -0,0 +1,98 @@
+import hashlib
+import itertools
+import json
+import numpy as np
+import os
+
+
+class TraceStore:
+    """
+    Columnar binary copy of a call trace. The CSV is converted once into one .npy file per column in
+    "<path>.columns/", which later loads are memory-mapped from; the copy is rebuilt whenever the source changes
+    """
+    COLUMNS = (
+        ("inter_arrival_time", np.float64),
+        ("base_station", np.int16),
+        ("duration", np.float64),
+        ("speed", np.float64),
+    )
+    CHUNK_SIZE = 100000
+
+    @classmethod
+    def load(cls, path: str = "./data.csv", check: str = "mtime"):
+        """
+        Return a dict of read-only memory-mapped columns, converting the trace first if needed.
+        check is "mtime" (size and modification time) or "hash" (SHA-256 of the content)
+        """
+        directory = cls.directory(path)
+        if not cls.is_fresh(path, check):
+            cls.convert(path, check)
+        return {name: np.load(os.path.join(directory, name + ".npy"), mmap_mode="r") for name, _ in cls.COLUMNS}
+
+    @classmethod
+    def directory(cls, path: str):
+        return path + ".columns"
+
+    @classmethod
+    def fingerprint(cls, path: str, check: str):
+        stat = os.stat(path)
+        fingerprint = {"size": stat.st_size}
+        if check == "mtime":
+            fingerprint["mtime_ns"] = stat.st_mtime_ns
+        elif check == "hash":
+            sha256 = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    sha256.update(block)
+            fingerprint["sha256"] = sha256.hexdigest()
+        else:
+            raise Exception("Unknown check")
+        return fingerprint
+
+    @classmethod
+    def is_fresh(cls, path: str, check: str):
+        meta_path = os.path.join(cls.directory(path), "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return all(meta.get(key) == value for key, value in cls.fingerprint(path, check).items())
+
+    @classmethod
+    def convert(cls, path: str, check: str = "mtime"):
+        """
+        Stream the CSV into the column files chunk by chunk, so that conversion runs in bounded memory
+        """
+        directory = cls.directory(path)
+        os.makedirs(directory, exist_ok=True)
+        # Invalidate first so that an interrupted conversion is never mistaken for a fresh one
+        meta_path = os.path.join(directory, "meta.json")
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        with open(path) as f:
+            no_rows = sum(1 for line in f if line.strip())
+        columns = [np.lib.format.open_memmap(os.path.join(directory, name + ".npy"), mode="w+", dtype=dtype,
+                                             shape=(no_rows,))
+                   for name, dtype in cls.COLUMNS]
+        with open(path) as f:
+            lines = (line for line in f if line.strip())
+            start = 0
+            last_arrival_time = 0.0
+            while start < no_rows:
+                rows = np.loadtxt(itertools.islice(lines, cls.CHUNK_SIZE), delimiter=",", usecols=(1, 2, 3, 4),
+                                  ndmin=2)
+                stop = start + len(rows)
+                arrival_time = rows[:, 0]
+                columns[0][start:stop] = np.diff(arrival_time, prepend=last_arrival_time)
+                columns[1][start:stop] = rows[:, 1]
+                columns[2][start:stop] = rows[:, 2]
+                columns[3][start:stop] = rows[:, 3]
+                last_arrival_time = arrival_time[-1]
+                start = stop
+        for column in columns:
+            column.flush()
+        del columns
+        meta = cls.fingerprint(path, check)
+        meta["no_rows"] = no_rows
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
@@ -0,0 +1,24 @@
+import os
+import tempfile
+import unittest
+from libs.trace_store import TraceStore
+
+
+class TestTraceStore(unittest.TestCase):
+    def test_rebuilds_when_source_changes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.csv")
+            with open(path, "w") as f:
+                f.write("1,0.500,3,100.0,120.0\r2,2.000,4,50.5,110.0\r")
+            columns = TraceStore.load(path)
+            self.assertEqual([0.5, 1.5], columns["inter_arrival_time"].tolist())
+            self.assertEqual([3, 4], columns["base_station"].tolist())
+            self.assertTrue(TraceStore.is_fresh(path, "mtime"))
+            with open(path, "a") as f:
+                f.write("3,2.250,5,10.0,100.0\r")
+            self.assertFalse(TraceStore.is_fresh(path, "mtime"))
+            self.assertEqual([0.5, 1.5, 0.25], TraceStore.load(path, check="hash")["inter_arrival_time"].tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+from libs.output_analysis import confidence_interval
+import numpy as np
+
+
+class VarianceReduction:
+    """
+    Point estimates and confidence intervals of a replication output, with antithetic pairs and/or control
+    variates. Each estimate reports its variance_reduction: one minus the ratio of the estimator variance to
+    the variance of the plain mean of as many independent replications (with the same number of simulated
+    replications); 0.3 means the same precision for 30% fewer replications
+    """
+
+    @classmethod
+    def estimate(cls, values, controls=None, control_means=None, antithetic: bool = False,
+                 confidence: float = 0.95):
+        """
+        values holds one output per replication; with antithetic, replications 2i and 2i + 1 form a pair and
+        the pair averages are the independent observations. controls holds one row of observed input means per
+        replication and control_means their known expectations
+        """
+        from scipy import stats
+        y = np.asarray(values, dtype=float)
+        # Variance of the plain mean of independent replications, from the marginal variance of the outputs
+        naive_variance = y.var(ddof=1) / len(y)
+        if controls is not None:
+            c = np.asarray(controls, dtype=float).reshape(len(y), -1) - np.asarray(control_means, dtype=float)
+        if antithetic:
+            y = y.reshape(-1, 2).mean(axis=1)
+            if controls is not None:
+                c = c.reshape(-1, 2, c.shape[1]).mean(axis=1)
+        n = len(y)
+        if controls is None:
+            mean = float(y.mean())
+            lower, upper = confidence_interval(y, confidence)
+            variance = y.var(ddof=1) / n
+        else:
+            # Regress the outputs on the centered controls: the intercept is the controlled estimate and its
+            # standard error comes from the residuals, with n - q - 1 degrees of freedom for q controls
+            x = np.column_stack((np.ones(n), c))
+            coefficients, _, _, _ = np.linalg.lstsq(x, y, rcond=None)
+            residuals = y - x.dot(coefficients)
+            degrees = n - x.shape[1]
+            if degrees < 1:
+                raise Exception("Not enough replications for the control variates")
+            variance = float(residuals.dot(residuals) / degrees * np.linalg.inv(x.T.dot(x))[0, 0])
+            mean = float(coefficients[0])
+            half_width = stats.t.ppf((1 + confidence) / 2., degrees) * np.sqrt(variance)
+            lower, upper = mean - half_width, mean + half_width
+        return {
+            "mean": mean,
+            "lower": float(lower),
+            "upper": float(upper),
+            "variance": float(variance),
+            "variance_reduction": float(1 - variance / naive_variance) if naive_variance > 0 else 0.,
+        }
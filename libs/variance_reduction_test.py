@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+from libs.random_number_generator import RandomNumberGenerator as RNG
+from libs.variance_reduction import VarianceReduction
+
+
+class TestVarianceReduction(unittest.TestCase):
+    def test_antithetic_pairs_cancel_noise(self):
+        a, b = RNG.antithetic_pair(4)
+        x = a.generate_durations(200)
+        y = b.generate_durations(200)
+        self.assertLess(np.corrcoef(x, y)[0, 1], -0.5)
+        values = np.column_stack((x, y)).ravel()
+        estimate = VarianceReduction.estimate(values, antithetic=True)
+        self.assertGreater(estimate["variance_reduction"], 0.5)
+        self.assertAlmostEqual(float(values.mean()), estimate["mean"])
+
+    def test_control_variates_remove_input_noise(self):
+        generator = np.random.default_rng(2)
+        controls = generator.normal(10, 1, 50)
+        values = 3 * controls + generator.normal(0, 0.1, 50)
+        estimate = VarianceReduction.estimate(values, controls, [10])
+        self.assertGreater(estimate["variance_reduction"], 0.9)
+        self.assertTrue(estimate["lower"] < 30 < estimate["upper"])
+
+    def test_plain_estimate_has_no_reduction(self):
+        estimate = VarianceReduction.estimate([1., 2., 3., 4.])
+        self.assertEqual(0, estimate["variance_reduction"])
+        self.assertEqual(2.5, estimate["mean"])
+
+
+if __name__ == '__main__':
+    unittest.main()
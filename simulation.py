@@ -1,262 +1,178 @@
-from libs.event import Event
-from libs.input_analysis import InputAnalyzer
-from libs.random_number_generator import RandomNumberGenerator as RNG
-from libs.output_analysis import OutputAnalyzer
+from libs.output_analysis import OutputAnalyzer, confidence_interval
+from libs.runner import ReplicationRunner
+from libs.sequential import SequentialRunner
+from libs.simulator import Simulator
+import argparse
+import csv
+import json
+import sys
 import numpy as np
-from scipy import stats
-import heapq
 
+MODES = ("stochastic", "trace", "empirical")
 
-class Simulator:
-    def __init__(self, index: int, no_events_total: int, output_analyzer: OutputAnalyzer, no_reserved: int,
-                 warm_up_events: int = 0,
-                 stochastic: bool = True):
-        """
-        Initialize state variables
-        """
-        # System clock
-        self.clock = 0
-        # Number of calls
-        self.no_call_created = 0
-        self.no_dropped_call = 0
-        self.no_blocked_call = 0
-        self.no_handover_call = 0
-        self.no_terminated_call = 0
-        # Warm up
-        self.warm_up_events = warm_up_events
-        # Preserve history
-        self.no_dropped_call_list = [0 for _ in range(no_events_total + 1)]
-        self.no_blocked_call_list = [0 for _ in range(no_events_total + 1)]
-        # Number of events
-        self.no_events_total = no_events_total
-        # Channels
-        self.no_free_channel = [10 for _ in range(21)]  # Index 0 is not used; only [1 ... 20] is used
-        self.no_reserved = no_reserved
-        self.stochastic = stochastic
-        # Event list (a priority queue)
-        self.event_list = []
-        # Analysis
-        self.output_analyzer = output_analyzer
-        self.drop_rate_list = [0 for _ in range(no_events_total + 1)]
-        self.block_rate_list = [0 for _ in range(no_events_total + 1)]
-        self.index = index
 
-    def run(self):
-        if not self.stochastic:
-            inter_arrival_time_list, base_station_list, duration_list, speed_list = InputAnalyzer.get_input_from_file()
-            total_event_count = len(inter_arrival_time_list)
-        else:
-            inter_arrival_time_list = [RNG.generate_inter_arrival_time() for _ in range(no_events_total)]
-            base_station_list = [RNG.generate_base_station() for _ in range(no_events_total)]
-            duration_list = [RNG.generate_duration() for _ in range(no_events_total)]
-            speed_list = [RNG.generate_speed() for _ in range(no_events_total)]
-            total_event_count = no_events_total
-        # Add the first event
-        idx = 0
-        event = Event(event_type="INITIALIZATION",
-                      arrival_time=self.clock + inter_arrival_time_list[idx],
-                      station=base_station_list[idx],
-                      duration=duration_list[idx],
-                      position=RNG.generate_position(),
-                      speed=speed_list[idx],
-                      direction=RNG.generate_direction())
-        heapq.heappush(self.event_list, event)
-        while len(self.event_list) > 0:
-            idx += 1
-            # Deque event from list until it is empty
-            self.handle_event(heapq.heappop(self.event_list))
-            # Add next initialization event
-            if idx < total_event_count:
-                # Set system clock to arrival time of the last initialized call
-                self.clock = event.arrival_time
-                event = Event(event_type="INITIALIZATION",
-                              arrival_time=self.clock + inter_arrival_time_list[idx],
-                              station=base_station_list[idx],
-                              duration=duration_list[idx],
-                              position=RNG.generate_position(),
-                              speed=speed_list[idx],
-                              direction=RNG.generate_direction())
-                heapq.heappush(self.event_list, event)
-        # Update analyzer
-        output_analyzer.update_data(self.index, self.drop_rate_list, self.block_rate_list)
-        print("{} blocked, {} dropped, {} terminated".format(self.no_blocked_call, self.no_dropped_call,
-                                                             self.no_terminated_call))
-        drop_rate = (self.no_dropped_call - self.no_dropped_call_list[self.warm_up_events]) / float(
-            self.no_call_created - self.warm_up_events) * 100
-        block_rate = (self.no_blocked_call - self.no_blocked_call_list[self.warm_up_events]) / float(
-            self.no_call_created - self.warm_up_events) * 100
-        return drop_rate, block_rate
+def parse_arguments(argv: [str] = None):
+    """
+    Scenario settings from the command line; --config names a JSON file of the same settings (keys as the option
+    names with underscores, e.g. {"no_events_total": 100000}), which flags given on the command line override
+    """
+    parser = argparse.ArgumentParser(description="Simulate calls on a highway cellular network")
+    parser.add_argument("--config", help="JSON file of settings")
+    parser.add_argument("--no-events-total", type=int, default=10000, help="calls per replication")
+    parser.add_argument("--iteration", type=int, default=1, help="number of replications")
+    parser.add_argument("--no-reserved", type=int, default=0, help="channels reserved for handovers")
+    parser.add_argument("--no-stations", type=int, default=20, help="base stations along the highway")
+    parser.add_argument("--no-channels", type=int, default=10, help="channels per base station")
+    parser.add_argument("--cell-length", type=float, default=2.0, help="length of a cell in km")
+    parser.add_argument("--seed", type=int, default=4015)
+    parser.add_argument("--mode", choices=MODES, default="stochastic",
+                        help="fitted distributions, replay of the trace, or bootstrap from the trace")
+    parser.add_argument("--trace-path", default="./data.csv")
+    parser.add_argument("--warm-up-events", type=int, default=None,
+                        help="calls discarded at the start of each replication; detected from pilots if omitted, "
+                             "except with --precision, which requires it")
+    parser.add_argument("--record-interval", type=int, default=1,
+                        help="calls between two points of the series, coarsened to keep at most 100000 points")
+    parser.add_argument("--max-workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="advance this many replications at once in each worker (same results, more memory); "
+                             "slower than one replication at a time below a few hundred replications")
+    parser.add_argument("--precision", type=float, default=None,
+                        help="run one long replication with batch means until both 95%% confidence intervals have "
+                             "this half-width (percentage points), instead of a fixed number of replications")
+    parser.add_argument("--antithetic", action="store_true", help="antithetic replication pairs")
+    parser.add_argument("--control-variates", action="store_true", help="control variates on the input means")
+    parser.add_argument("--output", help="write the results to this .json or .csv file")
+    parser.add_argument("--series-path", help="stream every replication's series to this compressed .npz file")
+    parser.add_argument("--figure", help="save the mean curves to this .png or .svg file")
+    parser.add_argument("--plot", action="store_true", help="show the mean curves in a window")
+    args = parser.parse_args(argv)
+    if args.config is not None:
+        with open(args.config) as f:
+            config = json.load(f)
+        actions = {action.dest: action for action in parser._actions}
+        for name, value in config.items():
+            if name not in actions or name == "config":
+                raise Exception("Unknown setting")
+            # Defaults bypass the checks of parse_args
+            if actions[name].choices is not None and value not in actions[name].choices:
+                raise Exception("Invalid value of {}".format(name))
+        parser.set_defaults(**config)
+        args = parser.parse_args(argv)
+    return args
 
-    def handle_event(self, event: Event):
-        if event.event_type == "INITIALIZATION":
-            self.handle_initialization(time=event.arrival_time,
-                                       speed=event.speed,
-                                       station=event.station,
-                                       duration=event.duration,
-                                       direction=event.direction,
-                                       position=event.position)
-        elif event.event_type == "HANDOVER":
-            self.handle_handover(time=event.arrival_time,
-                                 speed=event.speed,
-                                 station=event.station,
-                                 duration=event.duration,
-                                 direction=event.direction)
-        elif event.event_type == "TERMINATION":
-            self.handle_termination(time=event.arrival_time,
-                                    station=event.station)
-        else:
-            raise Exception("Unknown event type")
-        # Update statistics
-        self.drop_rate_list[self.no_call_created] = self.no_dropped_call / float(self.no_call_created) * 100
-        self.block_rate_list[self.no_call_created] = self.no_blocked_call / float(self.no_call_created) * 100
-        self.no_dropped_call_list[self.no_call_created] = self.no_dropped_call
-        self.no_blocked_call_list[self.no_call_created] = self.no_blocked_call
 
-    def handle_initialization(self, time: float, speed: float, station: int, position: float, duration: float,
-                              direction: str):
-        # Update system clock
-        self.clock = time
-        self.no_call_created += 1
-        # Check available channel from current station
-        if self.no_free_channel[station] - self.no_reserved <= 0:
-            # If no available channel, the call is blocked
-            self.no_blocked_call += 1
-            return
-        # Allocate that channel
-        self.no_free_channel[station] -= 1
-        if direction == "LEFT":
-            time_to_handover = position / speed * 3600  # Hour to second
-            next_station = station - 1
-        elif direction == "RIGHT":
-            time_to_handover = (2 - position) / speed * 3600  # Hour to second
-            next_station = station + 1
-        else:
-            raise Exception("Unknown direction")
-        # Decide whether to terminate the call
-        if duration <= time_to_handover:
-            # Finishing call
-            heapq.heappush(self.event_list, Event(
-                event_type="TERMINATION",
-                arrival_time=self.clock + duration,
-                station=station,
-                duration=0,
-                direction=direction,
-                speed=speed
-            ))
-            return
-        elif next_station == 0 or next_station == 21:
-            # Leaving highway
-            heapq.heappush(self.event_list, Event(
-                event_type="TERMINATION",
-                arrival_time=self.clock + time_to_handover,
-                station=station,
-                duration=0,
-                direction=direction,
-                speed=speed
-            ))
-            return
-        # Schedule the next handover
-        heapq.heappush(self.event_list, Event(event_type="HANDOVER",
-                                              arrival_time=self.clock + time_to_handover,
-                                              station=next_station,
-                                              duration=duration - time_to_handover,
-                                              direction=direction,
-                                              speed=speed,
-                                              ))
+def settings(args):
+    """
+    The scenario part of the arguments, recorded next to the results
+    """
+    return {name: value for name, value in sorted(vars(args).items())
+            if name not in ("config", "output", "series_path", "figure", "plot")}
 
-    def handle_handover(self, time: float, speed: float, station: int, duration: float, direction: str):
-        self.clock = time
-        if direction == "LEFT":
-            last_station = station + 1
-            next_station = station - 1
-        elif direction == "RIGHT":
-            last_station = station - 1
-            next_station = station + 1
-        else:
-            raise Exception("Unknown direction")
-        # Free the channel from used station
-        self.no_free_channel[last_station] += 1
-        if self.no_free_channel[station] == 0:
-            # If no free channel, drop the call
-            self.no_dropped_call += 1
-            return
-        # Allocate a channel from current station
-        self.no_free_channel[station] -= 1
-        # Plan the next handover
-        time_to_handover = 2 / speed * 3600  # Hour to second
-        # Decide whether to terminate the call
-        if duration <= time_to_handover:
-            # Finishing call
-            heapq.heappush(self.event_list, Event(
-                event_type="TERMINATION",
-                arrival_time=self.clock + duration,
-                station=station,
-                duration=0,
-                direction=direction,
-                speed=speed
-            ))
-            return
-        elif next_station == 0 or next_station == 21:
-            # Leaving highway
-            heapq.heappush(self.event_list, Event(
-                event_type="TERMINATION",
-                arrival_time=self.clock + time_to_handover,
-                station=station,
-                duration=0,
-                direction=direction,
-                speed=speed
-            ))
-            return
-        # Schedule the next handover
-        heapq.heappush(self.event_list, Event(event_type="HANDOVER",
-                                              arrival_time=self.clock + time_to_handover,
-                                              station=next_station,
-                                              duration=duration - time_to_handover,
-                                              direction=direction,
-                                              speed=speed,
-                                              ))
 
-    def handle_termination(self, time: float, station: int):
-        self.clock = time
-        self.no_free_channel[station] += 1
-        self.no_terminated_call += 1
+# Settings of run_replications, with their defaults, that a single sequential run has no use for
+REPLICATION_SETTINGS = (("iteration", 1), ("record_interval", 1), ("max_workers", None), ("batch_size", None),
+                        ("antithetic", False), ("control_variates", False), ("series_path", None), ("figure", None),
+                        ("plot", False))
 
 
-def confidence_interval(data, confidence=0.95):
-    a = 1.0 * np.array(data)
-    n = len(a)
-    m, se = np.mean(a), stats.sem(a)
-    h = se * stats.t.ppf((1 + confidence) / 2., n - 1)
-    return m - h, m + h
+def run_sequential(args):
+    unused = [name for name, default in REPLICATION_SETTINGS if getattr(args, name) != default]
+    if unused:
+        raise Exception("Not used with --precision: {}".format(", ".join(unused)))
+    if args.warm_up_events is None:
+        raise Exception("--precision needs --warm-up-events")
+    sequential_runner = SequentialRunner(no_reserved=args.no_reserved, precision=args.precision, seed=args.seed,
+                                         warm_up_events=args.warm_up_events, no_channels=args.no_channels,
+                                         no_stations=args.no_stations, cell_length=args.cell_length,
+                                         stochastic=args.mode != "trace", trace_path=args.trace_path,
+                                         empirical=args.mode == "empirical")
+    drop_rate, block_rate = sequential_runner.run()
+    print("{} calls in {} batches of {}".format(sequential_runner.no_calls, len(sequential_runner.batches),
+                                                sequential_runner.batch_size))
+    if not sequential_runner.converged():
+        print("Stopped before reaching the precision: the inputs or the call limit ran out")
+    print("Block rate {:.3f}%, 95% confidence interval [{:.3f}, {:.3f}]".format(*block_rate))
+    print("Drop rate {:.3f}%, 95% confidence interval [{:.3f}, {:.3f}]".format(*drop_rate))
+    results = {
+        "settings": settings(args),
+        "no_calls": sequential_runner.no_calls,
+        "batch_size": sequential_runner.batch_size,
+        "converged": sequential_runner.converged(),
+        "drop_rate": dict(zip(("mean", "lower", "upper"), (float(x) for x in drop_rate))),
+        "block_rate": dict(zip(("mean", "lower", "upper"), (float(x) for x in block_rate))),
+    }
+    rows = [{"batch": i, "no_calls": created, "no_dropped_call": dropped, "no_blocked_call": blocked}
+            for i, (created, dropped, blocked) in enumerate(sequential_runner.batches)]
+    return results, rows
+
+
+def run_replications(args):
+    output_analyzer = OutputAnalyzer(args.no_events_total, no_iteration=args.iteration,
+                                     record_interval=args.record_interval)
+    runner = ReplicationRunner(no_events_total=args.no_events_total, no_reserved=args.no_reserved,
+                               output_analyzer=output_analyzer, warm_up_events=args.warm_up_events,
+                               stochastic=args.mode != "trace", seed=args.seed, max_workers=args.max_workers,
+                               record_interval=args.record_interval, trace_path=args.trace_path,
+                               antithetic=args.antithetic, control_variates=args.control_variates,
+                               empirical=args.mode == "empirical", series_path=args.series_path,
+                               batch_size=args.batch_size, no_channels=args.no_channels,
+                               no_stations=args.no_stations, cell_length=args.cell_length)
+    drop_rate_list, block_rate_list = runner.run(args.iteration)
+    if args.warm_up_events is None:
+        print("Warm-up of {} calls detected from {} pilot replications of {} calls".format(
+            runner.warm_up_events, runner.pilot_iteration, runner.pilot_events))
+    results = {"settings": settings(args), "warm_up_events": runner.warm_up_events}
+    for name, rate_list in (("block_rate", block_rate_list), ("drop_rate", drop_rate_list)):
+        mean_rate = np.mean(rate_list)
+        variance_rate = np.std(rate_list)
+        lower, upper = confidence_interval(data=rate_list)
+        print("Mean {} {:.3f}%, standard deviation {:.3f}, 95% confidence interval [{:.3f}, {:.3f}]".format(
+            name.replace("_", " "), float(mean_rate), float(variance_rate), lower, upper))
+        results[name] = {"mean": float(mean_rate), "std": float(variance_rate), "lower": float(lower),
+                         "upper": float(upper)}
+    if args.antithetic or args.control_variates:
+        for name, estimate in sorted(runner.estimates.items()):
+            print("Variance-reduced {} {:.3f}%, 95% confidence interval [{:.3f}, {:.3f}], variance reduction "
+                  "{:.1%}".format(name.replace("_", " "), estimate["mean"], estimate["lower"], estimate["upper"],
+                                  estimate["variance_reduction"]))
+        results["estimates"] = runner.estimates
+    print("Mean utilization per station {}".format(np.round(output_analyzer.station_mean["utilization"], 3)))
+    print("Mean fraction of time full per station {}".format(np.round(output_analyzer.station_mean["full"], 3)))
+    results["stations"] = {name: mean.tolist() for name, mean in sorted(output_analyzer.station_mean.items())}
+    if args.figure is not None:
+        output_analyzer.render(args.figure)
+    if args.plot:
+        output_analyzer.plot()
+    rows = [{"replication": i, "drop_rate": drop_rate, "block_rate": block_rate}
+            for i, (drop_rate, block_rate) in enumerate(zip(drop_rate_list, block_rate_list))]
+    return results, rows
+
+
+def write_results(path: str, results: dict, rows: [dict]):
+    """
+    JSON gets the whole summary; CSV gets one row per replication (per batch in sequential mode)
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w") as f:
+            json.dump(dict(results, rows=rows), f, indent=2)
+
+
+def main(argv: [str] = None):
+    args = parse_arguments(argv)
+    if args.precision is not None:
+        results, rows = run_sequential(args)
+    else:
+        results, rows = run_replications(args)
+    if args.output is not None:
+        write_results(args.output, results, rows)
+    return results
 
 
 if __name__ == "__main__":
-    drop_rate_list = []
-    block_rate_list = []
-    no_events_total = 10000
-    no_reserved = 0
-    iteration = 1
-    output_analyzer = OutputAnalyzer(no_events_total, no_iteration=iteration)
-    for i in range(iteration):
-        print("Running simulation #" + str(i + 1))
-        simulator = Simulator(index=i, no_events_total=no_events_total, output_analyzer=output_analyzer,
-                              no_reserved=no_reserved, warm_up_events=0, stochastic=True)
-        drop_rate, block_rate = simulator.run()
-        # simulator.plot()
-        drop_rate_list.append(drop_rate)
-        block_rate_list.append(block_rate)
-    mean_drop_rate = np.mean(drop_rate_list)
-    mean_block_rate = np.mean(block_rate_list)
-    variance_drop_rate = np.std(drop_rate_list)
-    variance_block_rate = np.std(block_rate_list)
-    confidence_interval_drop_rate = confidence_interval(data=drop_rate_list)
-    confidence_interval_block_rate = confidence_interval(data=block_rate_list)
-    print("Mean block rate {:.3f}%, standard deviation {:.3f}, 95% confidence interval [{:.3f}, {:.3f}]".format(
-        float(mean_block_rate),
-        float(variance_block_rate),
-        *confidence_interval_block_rate))
-    print("Mean drop rate {:.3f}%, standard deviation {:.3f}, 95% confidence interval [{:.3f}, {:.3f}]".format(
-        float(mean_drop_rate),
-        float(variance_drop_rate),
-        *confidence_interval_drop_rate))
-    output_analyzer.plot()
+    main(sys.argv[1:])
@@ -0,0 +1,84 @@
+import csv
+import json
+import os
+import sys
+import tempfile
+import unittest
+import simulation
+
+
+class TestCommandLine(unittest.TestCase):
+    def test_config_file_is_overridden_by_flags(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "config.json")
+            with open(path, "w") as f:
+                json.dump({"no_events_total": 500, "iteration": 4, "mode": "trace"}, f)
+            args = simulation.parse_arguments(["--config", path, "--iteration", "2"])
+        self.assertEqual(500, args.no_events_total)
+        self.assertEqual(2, args.iteration)
+        self.assertEqual("trace", args.mode)
+
+    def test_unknown_setting_in_config_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "config.json")
+            with open(path, "w") as f:
+                json.dump({"no_event_total": 500}, f)
+            with self.assertRaises(Exception):
+                simulation.parse_arguments(["--config", path])
+
+    def test_invalid_choice_in_config_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "config.json")
+            with open(path, "w") as f:
+                json.dump({"mode": "tracee"}, f)
+            with self.assertRaises(Exception):
+                simulation.parse_arguments(["--config", path])
+
+    def test_writes_json_and_csv_results(self):
+        arguments = ["--no-events-total", "500", "--iteration", "2", "--warm-up-events", "50", "--max-workers", "1"]
+        with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                results = simulation.main(arguments + ["--output", os.path.join(directory, "results.json")])
+                simulation.main(arguments + ["--output", os.path.join(directory, "results.csv")])
+            finally:
+                sys.stdout = stdout
+            with open(os.path.join(directory, "results.json")) as f:
+                saved = json.load(f)
+            with open(os.path.join(directory, "results.csv")) as f:
+                rows = list(csv.DictReader(f))
+        self.assertEqual(results["block_rate"], saved["block_rate"])
+        self.assertEqual(500, saved["settings"]["no_events_total"])
+        self.assertEqual(20, len(saved["stations"]["utilization"]))
+        self.assertEqual(2, len(rows))
+        self.assertAlmostEqual(saved["rows"][1]["block_rate"], float(rows[1]["block_rate"]))
+
+    def test_precision_runs_in_the_chosen_mode(self):
+        arguments = ["--precision", "0.3", "--warm-up-events", "300"]
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull
+            try:
+                generated = simulation.main(arguments)
+                replayed = simulation.main(arguments + ["--mode", "trace"])
+            finally:
+                sys.stdout = stdout
+        self.assertTrue(generated["converged"])
+        # The trace holds 10000 calls, too few batches for the stopping rule
+        self.assertEqual("trace", replayed["settings"]["mode"])
+        self.assertEqual(10000, replayed["no_calls"])
+        self.assertFalse(replayed["converged"])
+        self.assertNotEqual(generated["block_rate"], replayed["block_rate"])
+
+    def test_precision_rejects_replication_settings(self):
+        for extra in (["--max-workers", "2"], ["--record-interval", "10"], ["--iteration", "5"]):
+            with self.assertRaises(Exception):
+                simulation.main(["--precision", "0.3", "--warm-up-events", "300"] + extra)
+
+    def test_precision_requires_warm_up(self):
+        with self.assertRaises(Exception) as context:
+            simulation.main(["--precision", "0.3"])
+        self.assertIn("--warm-up-events", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()